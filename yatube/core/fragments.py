@@ -0,0 +1,54 @@
+"""Per-user fragments punched into pages cached for every user.
+
+A page stored once for all users cannot contain anything that depends on
+who is looking at it. Such parts are rendered with the {% fragment %} tag:
+normally it renders the fragment in place, but while a shared page is
+being rendered (request.shared_render is set) it leaves a placeholder,
+and fill() replaces the placeholders with the fragments rendered for the
+current request whenever the stored page is served.
+"""
+import re
+
+from django.http import QueryDict
+from django.template.loader import render_to_string
+from django.utils.http import urlencode
+
+PLACEHOLDER = re.compile(r'<!--fragment:(\w+)\?([^>]*)-->')
+
+_registry = {}
+
+
+def register(name, template_name):
+    """Register a fragment; the decorated function returns its context.
+
+    The function receives the request and the keyword arguments given to
+    the tag, which are passed through the placeholder as strings.
+    """
+    def decorator(get_context):
+        _registry[name] = (template_name, get_context)
+        return get_context
+    return decorator
+
+
+def render(request, name, params):
+    template_name, get_context = _registry[name]
+    return render_to_string(
+        template_name, get_context(request, **params), request=request
+    )
+
+
+def placeholder(name, params):
+    return f'<!--fragment:{name}?{urlencode(params)}-->'
+
+
+def fill(request, content):
+    """Render the fragments of a shared page for request."""
+    def replace(match):
+        params = QueryDict(match.group(2)).dict()
+        return render(request, match.group(1), params)
+    return PLACEHOLDER.sub(replace, content)
+
+
+@register('header', 'includes/header.html')
+def header(request):
+    return {}
@@ -0,0 +1,52 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired sessions in small batches, each in its own '
+        'transaction, so the session table is never locked for long. '
+        'Unlike clearsessions it does not delete them in one statement.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Sessions deleted per statement.',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.1,
+            help='Seconds to wait between batches.',
+        )
+
+    def handle(self, *args, **options):
+        engine = import_module(settings.SESSION_ENGINE)
+        if not issubclass(engine.SessionStore, DBStore):
+            # Cookies and cache entries expire by themselves.
+            engine.SessionStore.clear_expired()
+            self.stdout.write('Sessions are not stored in the database.')
+            return
+        sessions = engine.SessionStore.get_model_class().objects
+        now = timezone.now()
+        deleted = 0
+        while True:
+            keys = list(
+                sessions.filter(expire_date__lt=now)
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            deleted += sessions.filter(pk__in=keys).delete()[0]
+            if len(keys) < options['batch_size']:
+                break
+            time.sleep(options['pause'])
+        self.stdout.write(f'Deleted {deleted} expired sessions.')
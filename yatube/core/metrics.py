@@ -0,0 +1,296 @@
+"""In-memory per-view request metrics.
+
+The metrics middleware measures a sample of requests: latency, number and
+time of database queries, cache hits and misses and template rendering
+time, and adds them to histograms of the view that served the request.
+The histograms live in the memory of the process, so each worker reports
+its own numbers; a Prometheus server scraping every worker sums them up.
+"""
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.core.cache import caches
+from django.db import connections
+from django.template.base import Template
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# Histograms of a view: (name, help, buckets).
+HISTOGRAMS = (
+    ('request_duration_seconds', 'Request latency.', SECONDS_BUCKETS),
+    ('db_queries', 'Database queries per request.', QUERY_BUCKETS),
+    ('db_duration_seconds', 'Time spent in database queries.',
+     SECONDS_BUCKETS),
+    ('template_duration_seconds', 'Time spent rendering templates.',
+     SECONDS_BUCKETS),
+)
+# Counters of a view: (name, help).
+COUNTERS = (
+    ('cache_hits_total', 'Cache keys found.'),
+    ('cache_misses_total', 'Cache keys not found.'),
+)
+
+_local = threading.local()
+_MISSING = object()
+
+
+class Histogram:
+    """Counts of observed values per bucket and their sum."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Yield (upper bound, observations up to it), '+Inf' last."""
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket.
+
+        Values beyond the last bucket are reported as the last bound,
+        the same way Prometheus' histogram_quantile() does.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower, seen = 0, 0
+        for bound, count in zip(self.buckets, self.counts):
+            if seen + count >= rank and count:
+                return lower + (bound - lower) * (rank - seen) / count
+            lower, seen = bound, seen + count
+        return self.buckets[-1]
+
+
+class ViewStats:
+    def __init__(self):
+        self.histograms = {
+            name: Histogram(buckets) for name, _, buckets in HISTOGRAMS
+        }
+        self.counters = {name: 0 for name, _ in COUNTERS}
+
+
+class Registry:
+    """Per-view metrics shared by the threads of a process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = defaultdict(ViewStats)
+
+    def record(self, view_name, sample):
+        with self.lock:
+            stats = self.views[view_name]
+            stats.histograms['request_duration_seconds'].observe(
+                sample.duration
+            )
+            stats.histograms['db_queries'].observe(sample.queries)
+            stats.histograms['db_duration_seconds'].observe(
+                sample.db_duration
+            )
+            stats.histograms['template_duration_seconds'].observe(
+                sample.template_duration
+            )
+            stats.counters['cache_hits_total'] += sample.cache_hits
+            stats.counters['cache_misses_total'] += sample.cache_misses
+
+    def summary(self):
+        """Return one row per view for the stats page, slowest first."""
+        with self.lock:
+            rows = []
+            for view_name, stats in self.views.items():
+                latency = stats.histograms['request_duration_seconds']
+                queries = stats.histograms['db_queries']
+                hits = stats.counters['cache_hits_total']
+                lookups = hits + stats.counters['cache_misses_total']
+                rows.append({
+                    'view': view_name,
+                    'requests': latency.count,
+                    'p50': latency.quantile(0.5),
+                    'p95': latency.quantile(0.95),
+                    'p99': latency.quantile(0.99),
+                    'queries': queries.sum / queries.count,
+                    'db_time': (
+                        stats.histograms['db_duration_seconds'].sum
+                        / latency.count
+                    ),
+                    'template_time': (
+                        stats.histograms['template_duration_seconds'].sum
+                        / latency.count
+                    ),
+                    'cache_hit_ratio': hits / lookups if lookups else None,
+                })
+        return sorted(rows, key=lambda row: row['p95'], reverse=True)
+
+    def exposition(self, prefix='yatube'):
+        """Render the metrics in the Prometheus text format."""
+        lines = []
+        with self.lock:
+            views = sorted(self.views.items())
+            for name, help_text, _ in HISTOGRAMS:
+                metric = f'{prefix}_{name}'
+                lines += [
+                    f'# HELP {metric} {help_text}',
+                    f'# TYPE {metric} histogram',
+                ]
+                for view_name, stats in views:
+                    histogram = stats.histograms[name]
+                    label = f'view="{view_name}"'
+                    for bound, total in histogram.cumulative():
+                        lines.append(
+                            f'{metric}_bucket{{{label},le="{bound}"}} {total}'
+                        )
+                    lines.append(f'{metric}_sum{{{label}}} {histogram.sum}')
+                    lines.append(
+                        f'{metric}_count{{{label}}} {histogram.count}'
+                    )
+            for name, help_text in COUNTERS:
+                metric = f'{prefix}_{name}'
+                lines += [
+                    f'# HELP {metric} {help_text}',
+                    f'# TYPE {metric} counter',
+                ]
+                for view_name, stats in views:
+                    lines.append(
+                        f'{metric}{{view="{view_name}"}} '
+                        f'{stats.counters[name]}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = Registry()
+
+
+class Sample:
+    """Measurements of a single request."""
+
+    def __init__(self):
+        self.duration = 0
+        self.queries = 0
+        self.db_duration = 0
+        self.template_duration = 0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_duration += time.perf_counter() - started
+
+
+@contextmanager
+def _track_cache(sample, alias='default'):
+    """Count the hits and misses of the thread's cache connection.
+
+    Cache connections are per thread, so wrapping the methods of this
+    instance only affects the request being measured.
+    """
+    backend = caches[alias]
+    get, get_many = backend.get, backend.get_many
+
+    def counting_get(key, default=None, version=None):
+        value = get(key, _MISSING, version=version)
+        if value is _MISSING:
+            sample.cache_misses += 1
+            return default
+        sample.cache_hits += 1
+        return value
+
+    def counting_get_many(keys, version=None):
+        keys = list(keys)
+        values = get_many(keys, version=version)
+        sample.cache_hits += len(values)
+        sample.cache_misses += len(keys) - len(values)
+        return values
+
+    backend.get, backend.get_many = counting_get, counting_get_many
+    try:
+        yield
+    finally:
+        del backend.get, backend.get_many
+
+
+_template_render = Template.render
+_patch_lock = threading.Lock()
+_measured = 0
+
+
+def _timed_render(self, context):
+    """Template.render adding the outermost render time to the sample."""
+    sample = getattr(_local, 'sample', None)
+    if sample is None:
+        return _template_render(self, context)
+    sample.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _template_render(self, context)
+    finally:
+        sample.template_depth -= 1
+        if not sample.template_depth:
+            sample.template_duration += time.perf_counter() - started
+
+
+@contextmanager
+def _time_templates(sample):
+    """Time template rendering into the sample.
+
+    Template.render is only replaced while at least one request is being
+    measured, so processes and requests that are not sampled render
+    templates untouched; other threads rendering meanwhile have no
+    sample and go straight to the original method.
+    """
+    global _measured
+    with _patch_lock:
+        if not _measured:
+            Template.render = _timed_render
+        _measured += 1
+    _local.sample = sample
+    try:
+        yield
+    finally:
+        _local.sample = None
+        with _patch_lock:
+            _measured -= 1
+            if not _measured:
+                Template.render = _template_render
+
+
+@contextmanager
+def measure():
+    """Collect a Sample of everything done inside the block."""
+    sample = Sample()
+    started = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(sample.execute_wrapper)
+                )
+            stack.enter_context(_track_cache(sample))
+            stack.enter_context(_time_templates(sample))
+            yield sample
+    finally:
+        sample.duration = time.perf_counter() - started
@@ -0,0 +1,43 @@
+import random
+
+from django.conf import settings
+
+from . import metrics, slow_queries
+
+UNRESOLVED = '<unresolved>'
+
+
+class MetricsMiddleware:
+    """Record per-view metrics of a random sample of requests.
+
+    METRICS_SAMPLE_RATE is the share of requests measured; the rest only
+    pay for one random() call.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= getattr(settings, 'METRICS_SAMPLE_RATE', 0.1):
+            return self.get_response(request)
+        with metrics.measure() as sample:
+            response = self.get_response(request)
+        match = request.resolver_match
+        metrics.registry.record(
+            match.view_name if match else UNRESOLVED, sample
+        )
+        return response
+
+
+class SlowQueryMiddleware:
+    """Make the current request known to the slow-query log."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        slow_queries.set_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            slow_queries.set_request(None)
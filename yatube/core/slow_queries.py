@@ -0,0 +1,138 @@
+"""Slow-query log.
+
+Every database connection gets an execute wrapper that times its queries.
+A query slower than SLOW_QUERY_THRESHOLD_MS is logged to the
+'yatube.slow_queries' logger with its SQL, the shape of its parameters,
+its duration, the view of the current request and the project code and
+template lines it was issued from. Only slow queries walk the stack, so
+the others cost two clock reads.
+
+The logger writes through AsyncRotatingFileHandler: records are put on a
+queue and written to the file by a background thread, so a slow disk
+never holds up a request.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from django.conf import settings
+
+logger = logging.getLogger('yatube.slow_queries')
+
+_local = threading.local()
+
+# Frames of the instrumentation itself are never the origin of a query.
+SKIPPED_FILES = {
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ('metrics.py', 'middleware.py', 'slow_queries.py')
+}
+
+
+class _RotatingFileHandler(RotatingFileHandler):
+    def _open(self):
+        # The directory is only made once there is something to write.
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class AsyncRotatingFileHandler(QueueHandler):
+    """Rotating file handler writing from a background thread."""
+
+    def __init__(self, filename, maxBytes=0, backupCount=0,
+                 encoding='utf-8'):
+        super().__init__(queue.SimpleQueue())
+        self.file_handler = _RotatingFileHandler(
+            filename, maxBytes=maxBytes, backupCount=backupCount,
+            encoding=encoding, delay=True,
+        )
+        self.listener = QueueListener(self.queue, self.file_handler)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+
+def set_request(request):
+    _local.request = request
+
+
+def params_shape(params, many):
+    """Describe the parameters of a query without their values."""
+    if many:
+        rows = params if isinstance(params, (list, tuple)) else None
+        return {
+            'rows': len(rows) if rows is not None else None,
+            'row': params_shape(rows[0], False) if rows else None,
+        }
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return {
+        'count': len(params),
+        'types': sorted({type(value).__name__ for value in params}),
+    }
+
+
+def find_origin():
+    """Return the innermost project code line and template line.
+
+    Either may be None: a query issued by a management command has no
+    template, one issued from a template tag of a library has no project
+    code line other than the view.
+    """
+    code_line = template_line = None
+    frame = sys._getframe(1)
+    while frame and not (code_line and template_line):
+        code = frame.f_code
+        if template_line is None and code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template_line = f'{origin.template_name}:{token.lineno}'
+        if (
+            code_line is None
+            and code.co_filename.startswith(settings.BASE_DIR)
+            and code.co_filename not in SKIPPED_FILES
+        ):
+            path = os.path.relpath(code.co_filename, settings.BASE_DIR)
+            code_line = f'{path}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return code_line, template_line
+
+
+def log_query(sql, params, many, duration):
+    request = getattr(_local, 'request', None)
+    match = getattr(request, 'resolver_match', None)
+    code_line, template_line = find_origin()
+    logger.warning(json.dumps({
+        'duration_ms': round(duration * 1000, 2),
+        'view': match.view_name if match else None,
+        'path': request.path if request is not None else None,
+        'code': code_line,
+        'template': template_line,
+        'sql': sql,
+        'params': params_shape(params, many),
+    }, ensure_ascii=False))
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+        if threshold is not None and duration * 1000 >= threshold:
+            log_query(sql, params, many, duration)
+
+
+def install(sender, connection, **kwargs):
+    """connection_created receiver adding the wrapper to a connection."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
@@ -0,0 +1,17 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import fragments
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def fragment(context, name, **params):
+    """Render a per-user fragment, or its placeholder in a shared page."""
+    request = context.get('request')
+    # Placeholders carry the arguments as strings, so pass strings here too.
+    params = {key: str(value) for key, value in params.items()}
+    if getattr(request, 'shared_render', False):
+        return mark_safe(fragments.placeholder(name, params))
+    return fragments.render(request, name, params)
@@ -0,0 +1,94 @@
+"""Тестирование сбора метрик запросов."""
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.base import Template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import Histogram, measure, registry
+
+User = get_user_model()
+
+STATS_PAGE = reverse('core:stats')
+METRICS_PAGE = reverse('core:prometheus')
+TOKEN = 'secret-token'
+
+
+@override_settings(METRICS_SAMPLE_RATE=1, METRICS_TOKEN=TOKEN)
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+        cls.user = User.objects.create_user(username='User')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.guest_client = Client()
+
+    def test_view_metrics(self):
+        """Для каждой view записываются время, запросы и обращения к кэшу."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        stats = registry.views['posts:index']
+        latency = stats.histograms['request_duration_seconds']
+        self.assertEqual(latency.count, 2)
+        self.assertGreater(latency.sum, 0)
+        self.assertGreater(stats.histograms['db_queries'].sum, 0)
+        self.assertGreater(
+            stats.histograms['template_duration_seconds'].sum, 0
+        )
+        self.assertGreater(stats.counters['cache_hits_total'], 0)
+        self.assertGreater(stats.counters['cache_misses_total'], 0)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sampling(self):
+        """Запросы вне выборки не замеряются."""
+        self.guest_client.get(reverse('posts:index'))
+        self.assertNotIn('posts:index', registry.views)
+
+    def test_render_patched_only_while_measuring(self):
+        """Template.render подменяется только на время замера."""
+        original = Template.render
+        with measure():
+            self.assertIsNot(Template.render, original)
+        self.assertIs(Template.render, original)
+
+    def test_access(self):
+        """Статистика доступна персоналу, метрики ещё и по токену."""
+        self.guest_client.get(reverse('posts:index'))
+        user_client = Client()
+        user_client.force_login(self.user)
+        staff_client = Client()
+        staff_client.force_login(self.staff)
+
+        self.assertEqual(
+            user_client.get(METRICS_PAGE).status_code, HTTPStatus.FORBIDDEN
+        )
+        response = self.guest_client.get(
+            METRICS_PAGE, HTTP_AUTHORIZATION=f'Bearer {TOKEN}'
+        )
+        self.assertContains(
+            response,
+            'yatube_request_duration_seconds_count{view="posts:index"} 1'
+        )
+        self.assertEqual(
+            staff_client.get(METRICS_PAGE).status_code, HTTPStatus.OK
+        )
+
+        self.assertRedirects(
+            user_client.get(STATS_PAGE),
+            f'{reverse("admin:login")}?next={STATS_PAGE}'
+        )
+        self.assertContains(staff_client.get(STATS_PAGE), 'posts:index')
+
+    def test_histogram_quantile(self):
+        """Квантиль оценивается внутри своей корзины."""
+        histogram = Histogram((1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 1.5)
+        self.assertEqual(list(histogram.cumulative())[-1], ('+Inf', 4))
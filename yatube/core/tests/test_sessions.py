@@ -0,0 +1,85 @@
+"""Тестирование хранения сессий и кэширования пользователя сессии."""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+User = get_user_model()
+
+PAGE = reverse('about:author')
+
+
+class CachedSessionUserTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Reader')
+
+    def setUp(self):
+        cache.clear()
+        self.user.refresh_from_db()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_signed_in_page_without_queries(self):
+        """Сессия и пользователь читаются из кэша."""
+        self.client.get(PAGE)
+        with self.assertNumQueries(0):
+            response = self.client.get(PAGE)
+            self.assertTrue(response.context['user'].is_authenticated)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_saved_user_is_reloaded(self):
+        """Изменённый пользователь перечитывается из базы."""
+        self.client.get(PAGE)
+        self.user.first_name = 'Имя'
+        self.user.save()
+        response = self.client.get(PAGE)
+        self.assertEqual(response.context['user'].first_name, 'Имя')
+
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(PAGE)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_sessions_of_model_backend_stay_signed_in(self):
+        """Сессии, открытые через ModelBackend, продолжают работать."""
+        client = Client()
+        client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = client.get(PAGE)
+        self.assertEqual(response.context['user'], self.user)
+
+
+class PurgeSessionsTest(TestCase):
+    def test_purges_expired_sessions_in_batches(self):
+        """Удаляются только истёкшие сессии, частями."""
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(
+                session_key=f'expired{i}',
+                session_data='',
+                expire_date=now - timedelta(days=1),
+            ) for i in range(5)
+        )
+        Session.objects.create(
+            session_key='active',
+            session_data='',
+            expire_date=now + timedelta(days=1),
+        )
+        out = StringIO()
+        call_command(
+            'purge_sessions', batch_size=2, pause=0, stdout=out
+        )
+        self.assertIn('Deleted 5 expired sessions.', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['active']
+        )
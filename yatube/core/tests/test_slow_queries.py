@@ -0,0 +1,68 @@
+"""Тестирование журнала медленных запросов."""
+import json
+
+from django.contrib.auth import get_user_model
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.slow_queries import params_shape
+
+User = get_user_model()
+
+LOGGER = 'yatube.slow_queries'
+
+
+class SlowQueryLogTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='PostAuthor')
+
+    def records(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_view_queries_are_attributed(self):
+        """В журнал попадают view, строка кода и форма параметров."""
+        url = reverse('posts:profile', args=(self.user.username,))
+        with self.assertLogs(LOGGER, 'WARNING') as logs:
+            Client().get(url)
+        records = self.records(logs)
+        record = next(
+            record for record in records
+            if record['code'] and record['code'].startswith('posts/views.py')
+        )
+        self.assertEqual(record['view'], 'posts:profile')
+        self.assertEqual(record['path'], url)
+        self.assertIn('SELECT', record['sql'])
+        self.assertEqual(record['params']['types'], ['str'])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_template_line(self):
+        """Запрос из шаблона указывает на строку шаблона."""
+        template = Template(
+            '{% for user in users %}\n{{ user.username }}{% endfor %}'
+        )
+        with self.assertLogs(LOGGER, 'WARNING') as logs:
+            template.render(Context({'users': User.objects.all()}))
+        record, = self.records(logs)
+        self.assertTrue(record['template'].endswith(':1'))
+        self.assertIsNone(record['view'])
+
+    def test_fast_queries_are_not_logged(self):
+        """Быстрые запросы в журнал не пишутся."""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs(LOGGER, 'WARNING'):
+                User.objects.count()
+
+    def test_params_shape(self):
+        """Значения параметров в журнал не попадают."""
+        self.assertEqual(
+            params_shape([1, 'secret', 2], False),
+            {'count': 3, 'types': ['int', 'str']}
+        )
+        self.assertEqual(
+            params_shape([(1, 'a'), (2, 'b')], True),
+            {'rows': 2, 'row': {'count': 2, 'types': ['int', 'str']}}
+        )
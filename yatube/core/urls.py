@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('admin/stats/', views.stats, name='stats'),
+    path('metrics', views.prometheus, name='prometheus'),
+]
@@ -1,4 +1,11 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from . import metrics
 
 
 def page_not_found(request, exception):
@@ -15,3 +22,32 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def stats(request):
+    """Per-view metrics of this process for staff users."""
+    context = {
+        'rows': metrics.registry.summary(),
+        'sample_rate': getattr(settings, 'METRICS_SAMPLE_RATE', 0.1),
+    }
+    return render(request, 'core/stats.html', context)
+
+
+def prometheus(request):
+    """Per-view metrics in the Prometheus text format.
+
+    Scrapers authenticate with 'Authorization: Bearer <METRICS_TOKEN>';
+    staff users may open it in the browser.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not (
+        token and constant_time_compare(header, f'Bearer {token}')
+        or request.user.is_staff
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        metrics.registry.exposition(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,6 +1,14 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from .models import (AuthorStats,
+                     Comment,
+                     Follow,
+                     Group,
+                     Post,
+                     Task,
+                     TrendingPost
+                     )
+from .search import get_backend
 
 
 @admin.register(Post)
@@ -21,10 +29,16 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск идёт по полнотекстовому индексу вместо LIKE по таблице
+        if not search_term:
+            return queryset, False
+        return get_backend().filter_posts(queryset, search_term), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('title',)
+    list_display = ('title', 'posts_count', 'last_post')
     empty_value_display = '-пусто-'
 
 
@@ -53,3 +67,39 @@ class FollowAdmin(admin.ModelAdmin):
     )
     # Добавляем возможность изменения author прямо в списке подписок
     list_editable = ('author',)
+
+
+@admin.register(AuthorStats)
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'user',
+        'posts_count',
+        'comments_count',
+        'followers_count',
+        'following_count',
+    )
+    # Счётчики обновляются сигналами, вручную их не редактируем
+    readonly_fields = list_display
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'created',
+        'run_after',
+        'attempts',
+        'last_error',
+    )
+    list_filter = ('name',)
+    # Задачи создаются сигналами и выполняются воркером run_tasks
+    readonly_fields = ('name', 'payload', 'created', 'attempts', 'last_error')
+
+
+@admin.register(TrendingPost)
+class TrendingPostAdmin(admin.ModelAdmin):
+    list_display = ('rank', 'post', 'score', 'velocity', 'computed')
+    ordering = ('rank',)
+    # Рейтинг пересчитывается командой update_trending
+    readonly_fields = list_display
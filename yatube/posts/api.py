@@ -0,0 +1,279 @@
+"""Read-only JSON API for posts, groups, comments and the follow feed.
+
+Rows are read with values() and serialized straight from the returned
+dicts, so no model instances are built. Lists are paged by cursor on the
+same keys as the HTML listings, '?fields=' picks a subset of a resource's
+fields and every response carries an ETag, so a client sending it back in
+If-None-Match gets an empty 304 while the data is unchanged.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control,
+                                patch_vary_headers,
+                                quote_etag
+                                )
+from django.views.decorators.http import require_safe
+
+from .feed import feed_posts
+from .models import Comment, Group, Post
+from .paginators import KeysetPaginator
+from .views import COMMENT_LMT, POST_LMT
+
+MAX_LIMIT = 100
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+def parse_thumbnails(value):
+    return json.loads(value) if value else {}
+
+
+class Resource:
+    """Fields of a model exposed by the API.
+
+    `fields` maps the output names to the lookups passed to values(),
+    `convert` holds functions applied to raw values of some of them.
+    """
+
+    def __init__(self, model, fields, ordering, convert=None):
+        self.model = model
+        self.fields = fields
+        self.ordering = ordering
+        self.convert = convert or {}
+
+    def requested(self, request):
+        """Return the output names asked for with '?fields='."""
+        raw = request.GET.get('fields')
+        if not raw:
+            return list(self.fields)
+        names = [name for name in raw.split(',') if name]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(400, f'Unknown fields: {", ".join(unknown)}.')
+        return names
+
+    def values(self, queryset, names):
+        """Select only the columns needed for names and the cursor."""
+        lookups = [self.fields[name] for name in names]
+        lookups += [key for key in self.ordering if key not in lookups]
+        return queryset.values(*lookups)
+
+    def serialize(self, row, names):
+        data = {}
+        for name in names:
+            value = row[self.fields[name]]
+            if name in self.convert:
+                value = self.convert[name](value)
+            data[name] = value
+        return data
+
+
+POST = Resource(
+    Post,
+    fields={
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'updated': 'updated',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'thumbnails': 'thumbnails',
+        'comments_count': 'comments_count',
+    },
+    ordering=('pub_date', 'id'),
+    convert={'image': media_url, 'thumbnails': parse_thumbnails},
+)
+GROUP = Resource(
+    Group,
+    fields={
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+    },
+    ordering=('id',),
+)
+COMMENT = Resource(
+    Comment,
+    fields={
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    },
+    ordering=('created', 'id'),
+)
+
+
+def json_response(request, data, status=200):
+    """Serialize data compactly and answer If-None-Match with a 304."""
+    body = json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False,
+        separators=(',', ':')
+    ).encode()
+    response = HttpResponse(
+        body, content_type='application/json', status=status
+    )
+    if status != 200:
+        return response
+    etag = quote_etag(hashlib.md5(body).hexdigest())
+    response['ETag'] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def api_view(private=False):
+    """Allow only GET and HEAD and turn ApiError into a JSON error.
+
+    Responses of private views depend on the session and must not be
+    stored by shared caches; the rest are revalidated by ETag.
+    """
+    def decorator(view):
+        @require_safe
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                response = view(request, *args, **kwargs)
+            except ApiError as error:
+                response = json_response(
+                    request, {'detail': error.detail}, status=error.status
+                )
+            if private:
+                patch_cache_control(response, private=True)
+                patch_vary_headers(response, ('Cookie',))
+            else:
+                patch_cache_control(response, max_age=0, public=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def page_limit(request, default):
+    raw = request.GET.get('limit')
+    if raw is None:
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ApiError(400, 'limit must be an integer.')
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ApiError(400, f'limit must be between 1 and {MAX_LIMIT}.')
+    return limit
+
+
+def page_link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def list_response(request, resource, queryset, default_limit=POST_LMT):
+    """Return a cursor page of queryset serialized by resource."""
+    names = resource.requested(request)
+    paginator = KeysetPaginator(
+        resource.values(queryset, names),
+        page_limit(request, default_limit),
+        ordering=resource.ordering,
+    )
+    page = paginator.cursor_page(request.GET.get('cursor'))
+    return json_response(request, {
+        'results': [resource.serialize(row, names) for row in page],
+        'next': page_link(request, page.next_cursor),
+        'previous': page_link(request, page.previous_cursor),
+    })
+
+
+def detail_response(request, resource, queryset):
+    """Return the only row of queryset serialized by resource."""
+    names = resource.requested(request)
+    rows = list(resource.values(queryset, names)[:1])
+    if not rows:
+        raise ApiError(404, 'Not found.')
+    return json_response(request, resource.serialize(rows[0], names))
+
+
+@api_view()
+def post_list(request):
+    """View-func for 'api/v1/posts/' request.
+
+    Lists posts newest first; '?author=' and '?group=' filter them
+    by username and group slug.
+    """
+    posts = Post.objects.all()
+    if 'author' in request.GET:
+        posts = posts.filter(author__username=request.GET['author'])
+    if 'group' in request.GET:
+        posts = posts.filter(group__slug=request.GET['group'])
+    return list_response(request, POST, posts)
+
+
+@api_view()
+def post_detail(request, post_id):
+    """View-func for 'api/v1/posts/<int:post_id>/' request."""
+    return detail_response(request, POST, Post.objects.filter(id=post_id))
+
+
+@api_view()
+def post_comments(request, post_id):
+    """View-func for 'api/v1/posts/<int:post_id>/comments/' request.
+
+    Lists the comments of a post newest first.
+    """
+    if not Post.objects.filter(id=post_id).exists():
+        raise ApiError(404, 'Not found.')
+    return list_response(
+        request, COMMENT, Comment.objects.filter(post_id=post_id),
+        default_limit=COMMENT_LMT,
+    )
+
+
+@api_view()
+def comment_detail(request, comment_id):
+    """View-func for 'api/v1/comments/<int:comment_id>/' request."""
+    return detail_response(
+        request, COMMENT, Comment.objects.filter(id=comment_id)
+    )
+
+
+@api_view()
+def group_list(request):
+    """View-func for 'api/v1/groups/' request.
+
+    Lists groups by descending id, the most recently created first.
+    """
+    return list_response(request, GROUP, Group.objects.all())
+
+
+@api_view()
+def group_detail(request, slug):
+    """View-func for 'api/v1/groups/<slug:slug>/' request."""
+    return detail_response(request, GROUP, Group.objects.filter(slug=slug))
+
+
+@api_view(private=True)
+def feed(request):
+    """View-func for 'api/v1/feed/' request.
+
+    Lists posts of the authors the user follows, newest first.
+    """
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Authentication required.')
+    return list_response(request, POST, feed_posts(request.user))
@@ -0,0 +1,251 @@
+"""Generational page cache for post pages.
+
+Every page is cached under a key that embeds version numbers of the
+scopes it depends on: the index, a group, an author or a single post.
+Signal handlers bump the versions of the scopes touched by a change, so
+stale pages are never served again and simply expire, while pages of
+unrelated scopes stay cached. The GLOBAL scope is part of every key and
+is bumped by changes that show up on every page, such as group titles.
+
+The same versions, together with the time each scope last changed, serve
+as ETag and Last-Modified validators, so a conditional GET of an
+unchanged page is answered with a 304 before the view runs.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (patch_cache_control,
+                                patch_response_headers,
+                                patch_vary_headers
+                                )
+from django.views.decorators.http import condition
+
+from core import fragments
+
+GLOBAL = 'global'
+INDEX = 'index'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def post_scopes(post):
+    """Return the scopes of every page a post is shown on."""
+    scopes = [
+        INDEX,
+        author_scope(post.author.username),
+        post_scope(post.pk),
+    ]
+    if post.group_id:
+        scopes.append(group_scope(post.group.slug))
+    return scopes
+
+
+def version_key(scope):
+    return f'posts:version:{scope}'
+
+
+def modified_key(scope):
+    return f'posts:modified:{scope}'
+
+
+def post_author_key(post_id):
+    return f'posts:post_author:{post_id}'
+
+
+def _get_or_add(initial):
+    """Return the cached values of the keys of initial, adding missing ones.
+
+    The values are read back after add(), so concurrent requests agree
+    on whichever value was stored first.
+    """
+    values = cache.get_many(list(initial))
+    missing = [key for key in initial if key not in values]
+    if missing:
+        for key in missing:
+            cache.add(key, initial[key], None)
+        values.update(cache.get_many(missing))
+    return values
+
+
+def get_versions(*scopes):
+    """Return the current versions of scopes in a single cache round-trip.
+
+    A missing version starts from the current time in milliseconds
+    rather than from 1, so a version evicted from the cache can never
+    resurrect pages cached under an earlier generation.
+    """
+    keys = [version_key(scope) for scope in scopes]
+    initial = int(time.time() * 1000)
+    versions = _get_or_add({key: initial for key in keys})
+    return tuple(versions.get(key, 0) for key in keys)
+
+
+def get_validators(*scopes):
+    """Return the versions of scopes and the time any of them last changed.
+
+    Both are read in a single cache round-trip. A scope without a
+    recorded change counts as changed now, so a lost timestamp can only
+    cost a full response, never a stale 304.
+    """
+    now = time.time()
+    initial = {version_key(scope): int(now * 1000) for scope in scopes}
+    initial.update({modified_key(scope): now for scope in scopes})
+    values = _get_or_add(initial)
+    versions = tuple(
+        values.get(version_key(scope), 0) for scope in scopes
+    )
+    modified = max(
+        values.get(modified_key(scope), now) for scope in scopes
+    )
+    return versions, modified
+
+
+def bump(*scopes):
+    """Invalidate every page cached under the given scopes."""
+    for scope in scopes:
+        key = version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), None)
+    now = time.time()
+    cache.set_many({modified_key(scope): now for scope in scopes}, None)
+
+
+def remember_post_author(post):
+    """Store the author of a post for the validators of its page."""
+    cache.set(post_author_key(post.pk), post.author.username, None)
+
+
+def post_page_scopes(post_id):
+    """Return the scopes of a post page, or None if the author is unknown.
+
+    The author is read from the cache rather than the database, so
+    validating a request costs no queries; the first render stores it.
+    """
+    username = cache.get(post_author_key(post_id))
+    if username is None:
+        return None
+    return (post_scope(post_id), author_scope(username))
+
+
+def _render_shared(view_func, request, *args, **kwargs):
+    """Render a page with its per-user fragments left as placeholders."""
+    request.shared_render = True
+    try:
+        return view_func(request, *args, **kwargs)
+    finally:
+        request.shared_render = False
+
+
+def _page_response(content, timeout, private=False):
+    response = HttpResponse(content)
+    patch_response_headers(response, timeout)
+    patch_vary_headers(response, ('Cookie',))
+    if private:
+        # The user's header, buttons and CSRF token are filled in.
+        patch_cache_control(response, private=True)
+    return response
+
+
+def versioned_cache_page(timeout, key_prefix, scopes=None):
+    """Cache a page once for every user, keyed on its scopes' versions.
+
+    The page is rendered with its per-user fragments left as placeholders
+    (see core.fragments) and stored under the versions of its scopes and
+    the url. Each request is served the stored page with the fragments
+    filled in for it; anonymous users all get the same filled page, so it
+    is stored as well. `scopes` receives the view kwargs and returns the
+    scopes the page depends on, or None to skip the cache; GLOBAL is
+    always included.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            page_scopes = scopes(**kwargs) if scopes else ()
+            if request.method not in ('GET', 'HEAD') or page_scopes is None:
+                return view_func(request, *args, **kwargs)
+            versions = get_versions(GLOBAL, *page_scopes)
+            url = request.build_absolute_uri().encode()
+            key = '.'.join([
+                key_prefix, *map(str, versions), hashlib.md5(url).hexdigest()
+            ])
+            anonymous_key = f'{key}.anonymous'
+            anonymous = not request.user.is_authenticated
+            if anonymous:
+                content = cache.get(anonymous_key)
+                if content is not None:
+                    return _page_response(content, timeout)
+
+            shared = cache.get(key)
+            if shared is None:
+                response = _render_shared(view_func, request, *args, **kwargs)
+                shared = response.content.decode(response.charset)
+                if response.status_code != 200:
+                    response.content = fragments.fill(request, shared)
+                    return response
+                cache.set(key, shared, timeout)
+            content = fragments.fill(request, shared)
+            if anonymous:
+                cache.set(anonymous_key, content, timeout)
+            return _page_response(content, timeout, private=not anonymous)
+        return wrapper
+    return decorator
+
+
+def conditional_page(key_prefix, scopes=None):
+    """Answer conditional GETs of a page from the versions of its scopes.
+
+    The ETag hashes the scope versions with the url and, for logged in
+    users, the user and their CSRF cookie, which the page also depends
+    on. Last-Modified is the latest change of any scope and is sent to
+    anonymous users only. `scopes` receives the view kwargs like in
+    versioned_cache_page; when it returns None the page is rendered
+    without validators.
+    """
+    def validators(request, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            request._page_validators = (None, None)
+            page_scopes = scopes(**kwargs) if scopes else ()
+            if page_scopes is not None:
+                versions, modified = get_validators(GLOBAL, *page_scopes)
+                parts = [key_prefix, request.get_full_path(), *versions]
+                last_modified = None
+                if request.user.is_authenticated:
+                    parts += [
+                        request.user.pk,
+                        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+                    ]
+                else:
+                    last_modified = datetime.fromtimestamp(
+                        modified, timezone.utc
+                    )
+                raw = '|'.join(map(str, parts)).encode()
+                request._page_validators = (
+                    hashlib.md5(raw).hexdigest(), last_modified
+                )
+        return request._page_validators
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: (
+            validators(request, **kwargs)[0]
+        ),
+        last_modified_func=lambda request, *args, **kwargs: (
+            validators(request, **kwargs)[1]
+        ),
+    )
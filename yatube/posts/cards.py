@@ -0,0 +1,133 @@
+"""Cached rendering of post cards.
+
+A post card is the block a listing shows for each post. Its cache key
+holds the post's `updated` timestamp and a digest of the author and group
+fields the card shows, so an edited post, a renamed group or author gets
+a new key and the old card is never served again.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+HITS_KEY = 'posts:card:stats:hits'
+MISSES_KEY = 'posts:card:stats:misses'
+
+
+def card_key(post, show_group=True):
+    related = '|'.join((
+        post.author.username,
+        post.author.get_full_name(),
+        post.group.slug if post.group_id else '',
+        post.group.title if post.group_id else '',
+    ))
+    digest = hashlib.md5(related.encode()).hexdigest()
+    return 'posts:card:{}:{}:{}:{}'.format(
+        post.pk, int(post.updated.timestamp() * 1000), int(show_group), digest
+    )
+
+
+class CardCounters:
+    """Card cache hits and misses of this process.
+
+    Renders only add to in-process counters; every
+    POST_CARD_STATS_FLUSH_INTERVAL seconds they are added to the shared
+    counters in the cache, so monitoring sees every worker without each
+    render paying for two more cache round-trips.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.hits = self.misses = 0
+            self.flushed = time.monotonic()
+
+    def add(self, hits, misses):
+        with self.lock:
+            self.hits += hits
+            self.misses += misses
+            interval = getattr(settings, 'POST_CARD_STATS_FLUSH_INTERVAL', 10)
+            due = time.monotonic() - self.flushed >= interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending = {HITS_KEY: self.hits, MISSES_KEY: self.misses}
+            self.hits = self.misses = 0
+            self.flushed = time.monotonic()
+        for key, delta in pending.items():
+            if not delta:
+                continue
+            try:
+                cache.incr(key, delta)
+            except ValueError:
+                if not cache.add(key, delta, None):
+                    cache.incr(key, delta)
+
+
+counters = CardCounters()
+
+
+def render_cards(posts, show_group=True):
+    """Return card markup of posts keyed by post id.
+
+    Cached cards are read with one get_many and the misses are written
+    back with one set_many, so the cards of a page cost two cache
+    round-trips at most whatever the number of posts; the hit and miss
+    counters only reach the cache on a periodic flush.
+    """
+    keys = {post.pk: card_key(post, show_group) for post in posts}
+    cached = cache.get_many(list(keys.values())) if keys else {}
+    cards, missing = {}, {}
+    for post in posts:
+        key = keys[post.pk]
+        if key in cached:
+            cards[post.pk] = cached[key]
+        else:
+            cards[post.pk] = missing[key] = render_to_string(
+                CARD_TEMPLATE, {'post': post, 'show_group': show_group}
+            )
+    if missing:
+        cache.set_many(
+            missing, getattr(settings, 'POST_CARD_CACHE_TIMEOUT', 86400)
+        )
+    counters.add(len(cards) - len(missing), len(missing))
+    return cards
+
+
+def attach_cards(posts, show_group=True):
+    """Set `card_html` on each post for the post_card tag to output."""
+    posts = list(posts)
+    cards = render_cards(posts, show_group)
+    for post in posts:
+        post.card_html = cards[post.pk]
+
+
+def render_card(post, show_group=True):
+    """Return the card markup of a single post."""
+    card = getattr(post, 'card_html', None)
+    if card is None:
+        card = render_cards([post], show_group)[post.pk]
+    return card
+
+
+def card_stats():
+    """Return the card cache hit and miss counters for monitoring."""
+    counters.flush()
+    totals = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = totals.get(HITS_KEY, 0)
+    misses = totals.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
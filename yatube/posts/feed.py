@@ -0,0 +1,209 @@
+"""Materialized follow feed.
+
+New posts are written into their followers' feeds when they are published
+(fan-out-on-write), so reading the feed is a single indexed lookup instead
+of a filter over every followed author. Authors with more than
+FEED_FANOUT_LIMIT followers are not fanned out: their posts are merged
+into the feed at read time (fan-out-on-read), which keeps publishing cheap
+for very popular authors.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import AuthorStats, FeedEntry, Follow, Post
+
+HEAVY_AUTHORS_KEY = 'feed:heavy_authors'
+BATCH_SIZE = 500
+
+
+def fanout_limit():
+    return getattr(settings, 'FEED_FANOUT_LIMIT', 1000)
+
+
+def is_heavy(author_id):
+    """Return True if the author's posts are read instead of fanned out."""
+    return AuthorStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=fanout_limit()
+    ).exists()
+
+
+def heavy_author_ids():
+    """Return ids of authors served by fan-out-on-read.
+
+    The set is shared by every feed read, so it is cached for
+    FEED_HEAVY_AUTHORS_TIMEOUT seconds.
+    """
+    author_ids = cache.get(HEAVY_AUTHORS_KEY)
+    if author_ids is None:
+        author_ids = list(
+            AuthorStats.objects.filter(followers_count__gt=fanout_limit())
+            .values_list('user_id', flat=True)
+        )
+        cache.set(
+            HEAVY_AUTHORS_KEY,
+            author_ids,
+            getattr(settings, 'FEED_HEAVY_AUTHORS_TIMEOUT', 60)
+        )
+    return author_ids
+
+
+def crossed_fanout_limit(author_id, delta):
+    """Return True if a change of followers by delta crossed the limit.
+
+    Called after the author's followers_count has been shifted by delta.
+    A crossing in either direction drops the cached heavy author ids, so
+    feeds start or stop reading the author's posts at once.
+    """
+    followers = (
+        AuthorStats.objects.filter(user_id=author_id)
+        .values_list('followers_count', flat=True)
+        .first()
+    )
+    crossed = followers == fanout_limit() + (1 if delta > 0 else 0)
+    if crossed:
+        cache.delete(HEAVY_AUTHORS_KEY)
+    return crossed
+
+
+def fan_out(post):
+    """Deliver a new post to the feeds of its author's followers."""
+    if is_heavy(post.author_id):
+        return
+    follower_ids = (
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+    )
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post=post)
+         for user_id in follower_ids.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_posts(posts):
+    """Deliver posts inserted in bulk to their authors' followers' feeds.
+
+    Does what fan_out does for each post, with one follower lookup per
+    author instead of one per post.
+    """
+    post_ids = defaultdict(list)
+    for post_id, author_id in posts.values_list('id', 'author_id').iterator():
+        post_ids[author_id].append(post_id)
+    heavy_ids = set(
+        AuthorStats.objects.filter(
+            user_id__in=list(post_ids),
+            followers_count__gt=fanout_limit()
+        ).values_list('user_id', flat=True)
+    )
+    for author_id, ids in post_ids.items():
+        if author_id in heavy_ids:
+            continue
+        follower_ids = list(
+            Follow.objects.filter(author_id=author_id)
+            .values_list('user_id', flat=True)
+        )
+        FeedEntry.objects.bulk_create(
+            (FeedEntry(user_id=user_id, post_id=post_id)
+             for user_id in follower_ids
+             for post_id in ids),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def backfill(user_id, author_id):
+    """Copy the author's latest posts into a new follower's feed."""
+    if is_heavy(author_id):
+        return
+    post_ids = (
+        Post.objects.filter(author_id=author_id)
+        .values_list('id', flat=True)
+        [:getattr(settings, 'FEED_BACKFILL_LIMIT', 500)]
+    )
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post_id=post_id)
+         for post_id in post_ids),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_followers(author_id):
+    """Copy the author's latest posts into the feeds of every follower.
+
+    Run when an author is no longer heavy: the posts published while
+    they were have no feed entries and would drop out of the feeds.
+    """
+    if is_heavy(author_id):
+        return
+    post_ids = list(
+        Post.objects.filter(author_id=author_id)
+        .values_list('id', flat=True)
+        [:getattr(settings, 'FEED_BACKFILL_LIMIT', 500)]
+    )
+    follower_ids = (
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+    )
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post_id=post_id)
+         for user_id in follower_ids.iterator()
+         for post_id in post_ids),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Remove the author's posts from a former follower's feed."""
+    FeedEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id
+    ).delete()
+
+
+def rebuild():
+    """Rebuild every feed from the follow graph with one INSERT ... SELECT.
+
+    Used after bulk loads that bypass the signals; unlike backfill it
+    copies all posts of every followed author that is not heavy.
+    """
+    tables = {
+        'feed': FeedEntry._meta.db_table,
+        'follow': Follow._meta.db_table,
+        'post': Post._meta.db_table,
+        'stats': AuthorStats._meta.db_table,
+    }
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('DELETE FROM {feed}'.format(**tables))
+        cursor.execute(
+            'INSERT INTO {feed} (user_id, post_id) '
+            'SELECT f.user_id, p.id FROM {follow} f '
+            'JOIN {post} p ON p.author_id = f.author_id '
+            'WHERE f.author_id NOT IN ('
+            'SELECT user_id FROM {stats} WHERE followers_count > %s)'
+            .format(**tables),
+            [fanout_limit()]
+        )
+    cache.delete(HEAVY_AUTHORS_KEY)
+
+
+def feed_posts(user):
+    """Return the follow feed of a user as a Post queryset."""
+    heavy_ids = heavy_author_ids()
+    if heavy_ids:
+        heavy_followed = Follow.objects.filter(
+            user=user,
+            author_id__in=heavy_ids
+        ).values('author_id')
+        return Post.objects.filter(
+            Q(id__in=FeedEntry.objects.filter(user=user).values('post_id'))
+            | Q(author_id__in=heavy_followed)
+        )
+    return Post.objects.filter(feed_entries__user=user)
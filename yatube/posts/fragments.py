@@ -0,0 +1,34 @@
+"""Parts of the post pages that depend on the user, see core.fragments."""
+from core import fragments
+
+from .forms import CommentForm
+from .models import Follow
+
+
+@fragments.register('switcher', 'posts/includes/switcher.html')
+def switcher(request):
+    return {}
+
+
+@fragments.register('follow_button', 'posts/includes/follow_button.html')
+def follow_button(request, author_id, username):
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(
+            user=request.user, author_id=author_id
+        ).exists()
+    )
+    return {'username': username, 'following': following}
+
+
+@fragments.register('post_edit_link', 'posts/includes/post_edit_link.html')
+def post_edit_link(request, post_id, author_id):
+    return {
+        'post_id': post_id,
+        'is_author': str(request.user.pk) == author_id,
+    }
+
+
+@fragments.register('comment_form', 'posts/includes/comment_form.html')
+def comment_form(request, post_id):
+    return {'post_id': post_id, 'form': CommentForm()}
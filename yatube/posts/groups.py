@@ -0,0 +1,50 @@
+"""In-process registry of groups.
+
+Groups are few and rarely edited, so every process keeps all of them,
+with their post counters, in memory. The registry is tagged with the
+version of the GROUPS cache scope, which saving or deleting a group and
+adding or removing a post of a group bump. A request compares the
+version with one cache read and reloads every group with one query only
+when it has moved, so the change reaches every worker.
+"""
+import threading
+
+from . import caching
+from .models import Group
+
+GROUPS = 'groups'
+
+
+class GroupRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (version, groups in title order, groups by slug)
+        self.state = None
+
+    def queryset(self):
+        return Group.objects.order_by('title')
+
+    def _current(self):
+        version, = caching.get_versions(GROUPS)
+        state = self.state
+        if state is None or state[0] != version:
+            with self.lock:
+                state = self.state
+                if state is None or state[0] != version:
+                    groups = tuple(self.queryset())
+                    state = self.state = (
+                        version,
+                        groups,
+                        {group.slug: group for group in groups},
+                    )
+        return state
+
+    def all(self):
+        return self._current()[1]
+
+    def get(self, slug):
+        """Return the group with this slug, or None."""
+        return self._current()[2].get(slug)
+
+
+registry = GroupRegistry()
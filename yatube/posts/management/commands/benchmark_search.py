@@ -0,0 +1,72 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.search import LikeSearchBackend, get_backend, query_terms
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the configured search backend with the LIKE baseline '
+        'on the current database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'queries',
+            nargs='*',
+            help='Queries to run; sampled from post texts if omitted.',
+        )
+        parser.add_argument('--samples', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--limit', type=int, default=100)
+
+    def sample_queries(self, samples):
+        texts = Post.objects.order_by('?').values_list(
+            'text', flat=True
+        )[:samples]
+        queries = []
+        for text in texts:
+            terms = [term for term in query_terms(text) if len(term) > 3]
+            if terms:
+                queries.append(random.choice(terms))
+        return queries
+
+    def measure(self, backend, queries, repeat, limit):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                backend.search(query, limit)
+            timings.append((time.perf_counter() - started) / repeat)
+        timings.sort()
+        return {
+            'p50': timings[len(timings) // 2],
+            'max': timings[-1],
+        }
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or self.sample_queries(
+            options['samples']
+        )
+        if not queries:
+            self.stderr.write('No queries to run: the posts table is empty.')
+            return
+        backends = (
+            ('LIKE baseline', LikeSearchBackend()),
+            (type(get_backend()).__name__, get_backend()),
+        )
+        self.stdout.write(
+            f'{len(queries)} queries x {options["repeat"]} runs '
+            f'over {Post.objects.count()} posts'
+        )
+        for name, backend in backends:
+            result = self.measure(
+                backend, queries, options['repeat'], options['limit']
+            )
+            self.stdout.write(
+                f'{name:>20}: p50 {result["p50"] * 1000:8.2f} ms, '
+                f'max {result["max"] * 1000:8.2f} ms'
+            )
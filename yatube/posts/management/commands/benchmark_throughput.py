@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (ThreadedWSGIServer,
+                                          WSGIRequestHandler,
+                                          WSGIServer
+                                          )
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Follow, Post
+from .benchmark_views import percentile
+
+SERVERS = {
+    'single': WSGIServer,
+    'threaded': ThreadedWSGIServer,
+}
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the WSGI application over HTTP and measure requests per '
+        'second of the read views under concurrent load, for a single '
+        'request at a time and for a thread per request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=400,
+            help='Requests per server mode.',
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Add a unique query string to miss the page cache.',
+        )
+        parser.add_argument('--json', help='Write the results to a file.')
+
+    def paths(self):
+        post = Post.objects.filter(group__isnull=False).select_related(
+            'author', 'group'
+        ).first()
+        follow = Follow.objects.select_related('user').first()
+        if post is None or follow is None:
+            raise CommandError('Not enough data: run seed_data first.')
+        client = Client()
+        client.force_login(follow.user)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+        return session, [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[post.group.slug]),
+            reverse('posts:profile', args=[post.author.username]),
+            reverse('posts:post_detail', args=[post.id]),
+            reverse('posts:follow_index'),
+        ]
+
+    def serve(self, server_class):
+        server = server_class(('127.0.0.1', 0), QuietHandler, ipv6=False)
+        server.set_app(get_wsgi_application())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
+
+    def run(self, server_class, session, paths, options):
+        server = self.serve(server_class)
+        port = server.server_address[1]
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session}'
+
+        def fetch(number):
+            path = paths[number % len(paths)]
+            if options['cold']:
+                path = f'{path}?bench={number}'
+            connection = HTTPConnection('127.0.0.1', port, timeout=60)
+            started = time.perf_counter()
+            connection.request('GET', path, headers={'Cookie': cookie})
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+            if response.status != 200:
+                raise CommandError(f'{path} returned {response.status}')
+            return time.perf_counter() - started
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as executor:
+                latencies = list(executor.map(
+                    fetch, range(options['requests'])
+                ))
+            elapsed = time.perf_counter() - started
+        finally:
+            server.shutdown()
+            server.server_close()
+        return {
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        }
+
+    def handle(self, *args, **options):
+        session, paths = self.paths()
+        results = {}
+        self.stdout.write(
+            f'{"server":<12}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}'
+        )
+        for name, server_class in SERVERS.items():
+            result = self.run(server_class, session, paths, options)
+            results[name] = result
+            self.stdout.write(
+                f'{name:<12}{result["requests_per_second"]:>10}'
+                f'{result["p50_ms"]:>10}{result["p99_ms"]:>10}'
+            )
+        if options['json']:
+            with open(options['json'], 'w') as file:
+                json.dump(results, file, indent=2)
@@ -0,0 +1,174 @@
+import json
+import random
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+
+VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+    'posts:add_comment',
+)
+
+
+def percentile(values, share):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, int(round(share * len(ordered) + 0.5)) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure latency, queries and memory per request of the posts '
+        'views against the current database and check them against '
+        'regression thresholds.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument(
+            '--memory-samples',
+            type=int,
+            default=5,
+            help='Requests per view traced with tracemalloc.',
+        )
+        parser.add_argument(
+            '--warm-cache',
+            action='store_true',
+            help='Keep the page cache between requests.',
+        )
+        parser.add_argument(
+            '--thresholds',
+            help='JSON file with p99_ms, max_queries and peak_kb per view.',
+        )
+        parser.add_argument('--json', help='Write the results to a file.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def targets(self, rng):
+        """Return a function building a (method, url, data) per view."""
+        reader = (
+            Follow.objects.values_list('user', flat=True)
+            .order_by('-user__stats__following_count').first()
+        )
+        if reader is None:
+            raise CommandError('No follows found: run seed_data first.')
+        slugs = list(Group.objects.values_list('slug', flat=True)[:1000])
+        authors = list(
+            User.objects.filter(stats__posts_count__gt=0)
+            .values_list('username', flat=True)[:1000]
+        )
+        last_id = Post.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first()
+        if not (slugs and authors and last_id):
+            raise CommandError('Not enough data: run seed_data first.')
+
+        def post_id():
+            return rng.randint(1, last_id)
+
+        def build(view):
+            if view == 'posts:group_list':
+                return 'get', reverse(view, args=[rng.choice(slugs)]), None
+            if view == 'posts:profile':
+                return 'get', reverse(view, args=[rng.choice(authors)]), None
+            if view == 'posts:post_detail':
+                return 'get', reverse(view, args=[post_id()]), None
+            if view == 'posts:add_comment':
+                return 'post', reverse(view, args=[post_id()]), {
+                    'text': 'Комментарий из нагрузочного теста',
+                }
+            return 'get', reverse(view), None
+
+        return User.objects.get(pk=reader), build
+
+    def request(self, client, target, warm_cache):
+        method, url, data = target
+        if not warm_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 500:
+            raise CommandError(f'{url} returned {response.status_code}')
+        return elapsed, len(queries.captured_queries)
+
+    def measure(self, client, build, view, options):
+        self.request(client, build(view), True)
+        latencies, queries = [], []
+        for _ in range(options['requests']):
+            elapsed, count = self.request(
+                client, build(view), options['warm_cache']
+            )
+            latencies.append(elapsed * 1000)
+            queries.append(count)
+
+        peaks = []
+        for _ in range(options['memory_samples']):
+            tracemalloc.start()
+            self.request(client, build(view), options['warm_cache'])
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+        return {
+            'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'mean_queries': round(sum(queries) / len(queries), 2),
+            'max_queries': max(queries),
+            'peak_kb': round(max(peaks), 1) if peaks else None,
+        }
+
+    def check_thresholds(self, results, path):
+        with open(path) as file:
+            thresholds = json.load(file)
+        failures = []
+        for view, limits in thresholds.items():
+            measured = results.get(view)
+            if measured is None:
+                continue
+            for metric, limit in limits.items():
+                value = measured.get(metric)
+                if value is not None and value > limit:
+                    failures.append(f'{view} {metric}: {value} > {limit}')
+        return failures
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        reader, build = self.targets(rng)
+        client = Client()
+        client.force_login(reader)
+
+        results = {}
+        self.stdout.write(
+            f'{"view":<20}{"p50 ms":>10}{"p99 ms":>10}'
+            f'{"queries":>10}{"peak KB":>10}'
+        )
+        for view in VIEWS:
+            result = self.measure(client, build, view, options)
+            results[view] = result
+            self.stdout.write(
+                f'{view:<20}{result["p50_ms"]:>10}{result["p99_ms"]:>10}'
+                f'{result["max_queries"]:>10}{result["peak_kb"] or "-":>10}'
+            )
+
+        if options['json']:
+            with open(options['json'], 'w') as file:
+                json.dump(results, file, indent=2)
+        if options['thresholds']:
+            failures = self.check_thresholds(results, options['thresholds'])
+            if failures:
+                raise CommandError(
+                    'Performance regressions:\n' + '\n'.join(failures)
+                )
+            self.stdout.write('All views are within thresholds.')
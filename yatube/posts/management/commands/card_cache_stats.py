@@ -0,0 +1,12 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts.cards import card_stats
+
+
+class Command(BaseCommand):
+    help = 'Print the post card cache hit and miss counters as JSON.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(card_stats()))
@@ -0,0 +1,146 @@
+import re
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from posts.groups import registry
+from posts.models import Comment, Follow, Post
+
+# Plan lines that mean the whole table is read or the rows are sorted
+# outside an index, per database vendor.
+PROBLEMS = {
+    'sqlite': (
+        ('table scan', re.compile(r'\bSCAN (TABLE )?\w+( AS \w+)?$')),
+        ('temp sort', re.compile(r'USE TEMP B-TREE')),
+    ),
+    'postgresql': (
+        ('table scan', re.compile(r'Seq Scan on')),
+        ('temp sort', re.compile(r'^\s*(->\s*)?Sort\b')),
+    ),
+}
+EXPLAIN = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+# The follow feed joins the reader's feed entries to their posts and sorts
+# only those rows, so its sort grows with one feed, not with the table.
+ALLOWED = {
+    ('posts:follow_index', 'temp sort'),
+}
+# The group registry reads the whole group table on purpose: groups are
+# few, and it is read again only after one of them changes.
+WHOLE_TABLE_READS = {
+    str(registry.queryset().query),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every listing page, run EXPLAIN on each query it makes '
+        'and fail if a plan reads a whole table or sorts without an index. '
+        'Run it against a seeded database: planners prefer scans on '
+        'nearly empty tables.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--show-plans',
+            action='store_true',
+            help='Print the plan of every query.',
+        )
+
+    def targets(self):
+        """Return (view name, url) pairs covering every listing."""
+        post = Post.objects.filter(
+            group__isnull=False, comments_count__gt=0
+        ).select_related('author', 'group').first()
+        follow = Follow.objects.select_related('user').first()
+        if post is None or follow is None:
+            raise CommandError('Not enough data: run seed_data first.')
+        word = Comment.objects.filter(post=post).first().text.split()[0]
+        return follow.user, (
+            ('posts:index', reverse('posts:index')),
+            ('posts:index', reverse('posts:index') + '?page=2'),
+            ('posts:trending', reverse('posts:trending')),
+            ('posts:group_list',
+             reverse('posts:group_list', args=[post.group.slug])),
+            ('posts:profile',
+             reverse('posts:profile', args=[post.author.username])),
+            ('posts:post_detail',
+             reverse('posts:post_detail', args=[post.id])),
+            ('posts:post_comments',
+             reverse('posts:post_comments', args=[post.id])),
+            ('posts:follow_index', reverse('posts:follow_index')),
+            ('posts:search', reverse('posts:search') + f'?q={word}'),
+        )
+
+    def capture(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned {response.status_code}')
+        next_cursor = None
+        page = (response.context or {}).get('page_obj')
+        if getattr(page, 'is_keyset', False):
+            next_cursor = page.next_cursor
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT')
+        ], next_cursor
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(EXPLAIN[connection.vendor] + sql)
+            return [
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            ]
+
+    def check_view(self, client, view, url, options):
+        statements, next_cursor = self.capture(client, url)
+        if next_cursor:
+            separator = '&' if '?' in url else '?'
+            more, _ = self.capture(
+                client, f'{url}{separator}cursor={next_cursor}'
+            )
+            statements += more
+        problems = []
+        for sql in statements:
+            if sql in WHOLE_TABLE_READS:
+                continue
+            plan = self.explain(sql)
+            if options['show_plans']:
+                self.stdout.write(f'{view}: {sql}')
+                for line in plan:
+                    self.stdout.write(f'    {line}')
+            for kind, pattern in PROBLEMS[connection.vendor]:
+                if (view, kind) in ALLOWED:
+                    continue
+                if any(pattern.search(line) for line in plan):
+                    problems.append(f'{view} {url}: {kind} in {sql}')
+        return problems
+
+    def handle(self, *args, **options):
+        if connection.vendor not in PROBLEMS:
+            raise CommandError(
+                f'EXPLAIN output of {connection.vendor} is not supported.'
+            )
+        reader, targets = self.targets()
+        client = Client()
+        client.force_login(reader)
+        problems = []
+        for pagination in ('offset', 'keyset'):
+            with override_settings(POSTS_PAGINATION=pagination):
+                for view, url in targets:
+                    problems += self.check_view(client, view, url, options)
+        if problems:
+            raise CommandError(
+                'Queries without a usable index:\n' + '\n'.join(problems)
+            )
+        self.stdout.write('Every listing query is served by an index.')
@@ -0,0 +1,80 @@
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+# Columns of an exported post; authors and groups are referenced by their
+# natural keys so the file can be loaded into another database.
+FIELDS = ('author', 'group', 'text', 'pub_date', 'image')
+FORMATS = ('ndjson', 'csv')
+
+
+def guess_format(path, given):
+    if given:
+        return given
+    return 'csv' if path.endswith('.csv') else 'ndjson'
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream every post to an NDJSON or CSV file in constant memory. '
+        'Use "-" to write to stdout.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows fetched from the database per round-trip.',
+        )
+
+    def rows(self, batch_size):
+        posts = Post.objects.order_by('id').values_list(
+            'author__username', 'group__slug', 'text', 'pub_date', 'image'
+        )
+        for author, group, text, pub_date, image in posts.iterator(
+            chunk_size=batch_size
+        ):
+            yield {
+                'author': author,
+                'group': group or '',
+                'text': text,
+                'pub_date': pub_date.isoformat(),
+                'image': image or '',
+            }
+
+    def handle(self, *args, **options):
+        path = options['output']
+        output_format = guess_format(path, options['format'])
+        file = (
+            sys.stdout if path == '-'
+            else open(path, 'w', encoding='utf-8', newline='')
+        )
+        started = time.perf_counter()
+        total = 0
+        try:
+            if output_format == 'csv':
+                writer = csv.DictWriter(file, fieldnames=FIELDS)
+                writer.writeheader()
+                write = writer.writerow
+            else:
+                def write(row):
+                    file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            for row in self.rows(options['batch_size']):
+                write(row)
+                total += 1
+        finally:
+            if file is not sys.stdout:
+                file.close()
+        elapsed = time.perf_counter() - started
+        self.stderr.write(
+            f'Exported {total} posts in {elapsed:.1f} s '
+            f'({total / elapsed if elapsed else 0:.0f} posts/s).'
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Render missing thumbnails of posts with images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Render thumbnails of every post, not only missing ones.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(thumbnails='')
+        done = 0
+        for post_id in posts.values_list('id', flat=True).iterator():
+            thumbnails.generate(post_id)
+            done += 1
+        self.stdout.write(f'Thumbnails rendered for {done} posts.')
@@ -0,0 +1,240 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Max
+from django.utils.dateparse import parse_datetime
+
+from posts import caching, feed
+from posts.caching import INDEX
+from posts.groups import GROUPS
+from posts.models import AuthorStats, Group, Post, User
+from posts.search import get_backend
+from .export_posts import FIELDS, FORMATS, guess_format
+from .seed_data import explicit_dates
+
+
+class Lookup:
+    """Natural key to id mapping filled one batch of misses at a time."""
+
+    def __init__(self, model, field, create):
+        self.model = model
+        self.field = field
+        self.create = create
+        self.ids = {}
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key and key not in self.ids}
+        if not missing:
+            return
+        self.load(missing)
+        missing -= self.ids.keys()
+        if missing and self.create:
+            self.model.objects.bulk_create(
+                (self.create(key) for key in missing),
+                ignore_conflicts=True,
+            )
+            self.load(missing)
+
+    def load(self, keys):
+        self.ids.update(
+            self.model.objects.filter(**{f'{self.field}__in': keys})
+            .values_list(self.field, 'id')
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Load posts from an NDJSON or CSV file made by export_posts with '
+        'batched bulk inserts. Use "-" to read from stdin.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--create-missing',
+            action='store_true',
+            help='Create unknown authors and groups instead of skipping.',
+        )
+        parser.add_argument(
+            '--media-root',
+            help='Directory to copy the referenced images from.',
+        )
+        parser.add_argument(
+            '--skip-rebuild',
+            action='store_true',
+            help='Do not update counters, feeds, the search index and '
+                 'cached pages.',
+        )
+
+    def rows(self, file, input_format):
+        """Yield (line number, row) pairs."""
+        if input_format == 'csv':
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                raise CommandError(f'Line {number}: invalid JSON.')
+
+    def clean_row(self, number, row):
+        missing = set(FIELDS) - row.keys()
+        if missing:
+            raise CommandError(
+                f'Line {number}: missing columns: '
+                f'{", ".join(sorted(missing))}'
+            )
+        try:
+            pub_date = parse_datetime(row['pub_date'] or '')
+        except ValueError:
+            pub_date = None
+        if pub_date is None:
+            raise CommandError(
+                f'Line {number}: invalid pub_date {row["pub_date"]!r}.'
+            )
+        row['pub_date'] = pub_date
+        return row
+
+    def copy_image(self, name, media_root):
+        if not name or default_storage.exists(name):
+            return
+        source = os.path.join(media_root, name)
+        if not os.path.exists(source):
+            self.stderr.write(f'Image not found: {source}')
+            return
+        with open(source, 'rb') as image:
+            default_storage.save(name, File(image))
+
+    def import_batch(self, batch, authors, groups, media_root):
+        """Insert a batch of rows and return (imported, skipped)."""
+        authors.resolve(row['author'] for row in batch)
+        groups.resolve(row['group'] for row in batch)
+        posts = []
+        for row in batch:
+            author_id = authors.ids.get(row['author'])
+            if author_id is None or (
+                row['group'] and row['group'] not in groups.ids
+            ):
+                continue
+            if media_root:
+                self.copy_image(row['image'], media_root)
+            posts.append(Post(
+                author_id=author_id,
+                group_id=groups.ids.get(row['group']),
+                text=row['text'],
+                pub_date=row['pub_date'],
+                updated=row['pub_date'],
+                image=row['image'],
+            ))
+        Post.objects.bulk_create(posts)
+        return len(posts), len(batch) - len(posts)
+
+    def batches(self, path, input_format, size):
+        file = (
+            sys.stdin if path == '-'
+            else open(path, encoding='utf-8', newline='')
+        )
+        try:
+            batch = []
+            for number, row in self.rows(file, input_format):
+                batch.append(self.clean_row(number, row))
+                if len(batch) == size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+    def update_derived(self, start_id):
+        """Update the data derived from the posts imported after start_id.
+
+        Bulk inserts skip the signals, so this does their work for the
+        new posts only: counters of their authors and groups, feeds of
+        the authors' followers, the search index and the cached pages
+        showing them. Nothing else is rebuilt or dropped from the cache.
+        """
+        posts = Post.objects.filter(pk__gt=start_id).order_by()
+        authors = dict(
+            posts.values('author').annotate(total=Count('pk'))
+            .values_list('author', 'total')
+        )
+        for author_id, total in authors.items():
+            AuthorStats.objects.add(author_id, posts_count=total)
+        group_ids = set(
+            posts.exclude(group=None).values_list('group', flat=True)
+        )
+        Group.objects.filter(pk__in=group_ids).recount_posts()
+        feed.fan_out_posts(posts)
+        backend = get_backend()
+        for post in posts.only('id', 'text').iterator():
+            backend.index_post(post)
+        caching.bump(
+            INDEX,
+            GROUPS,
+            *(caching.author_scope(username) for username in User.objects
+              .filter(pk__in=list(authors))
+              .values_list('username', flat=True)),
+            *(caching.group_scope(slug) for slug in Group.objects
+              .filter(pk__in=group_ids).values_list('slug', flat=True)),
+        )
+
+    def handle(self, *args, **options):
+        password = make_password(None)
+        create = options['create_missing']
+        authors = Lookup(
+            User, 'username',
+            (lambda key: User(username=key, password=password))
+            if create else None,
+        )
+        groups = Lookup(
+            Group, 'slug',
+            (lambda key: Group(title=key, slug=key)) if create else None,
+        )
+
+        started = time.perf_counter()
+        start_id = Post.objects.aggregate(last=Max('id'))['last'] or 0
+        imported = skipped = 0
+        batches = self.batches(
+            options['input'],
+            guess_format(options['input'], options['format']),
+            options['batch_size'],
+        )
+        try:
+            with explicit_dates():
+                for batch in batches:
+                    done, missed = self.import_batch(
+                        batch, authors, groups, options['media_root']
+                    )
+                    imported += done
+                    skipped += missed
+                    if options['verbosity'] > 1:
+                        rate = imported / (time.perf_counter() - started)
+                        self.stderr.write(
+                            f'{imported} posts imported, {rate:.0f} posts/s'
+                        )
+        finally:
+            # A bad row stops the import after earlier batches were
+            # inserted; those posts still get their derived data.
+            if not options['skip_rebuild']:
+                self.update_derived(start_id)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Imported {imported} posts, skipped {skipped} in {elapsed:.1f} s '
+            f'({imported / elapsed if elapsed else 0:.0f} posts/s). '
+            'Run generate_thumbnails for the imported images.'
+        )
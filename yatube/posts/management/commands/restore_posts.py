@@ -0,0 +1,175 @@
+import gzip
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from posts import feed
+from posts.models import AuthorStats, Group
+from posts.search import get_backend
+from .backup_posts import FORMAT_VERSION, MANIFEST, MODELS
+from .seed_data import explicit_dates
+
+
+# Apps whose tables referencing the backed up models hold derived data,
+# which is emptied by --flush and rebuilt after the restore.
+DERIVED_APPS = ('posts',)
+
+
+def read_chunk(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+class Command(BaseCommand):
+    help = (
+        'Restore a backup made by backup_posts with bulk inserts in one '
+        'transaction, checking foreign keys once at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Threads reading and decompressing chunks ahead.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows per INSERT, the database maximum by default.',
+        )
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Empty the backed up tables and the derived data '
+                 'referencing them first.',
+        )
+
+    def load_manifest(self, directory):
+        path = os.path.join(directory, MANIFEST)
+        if not os.path.exists(path):
+            raise CommandError(f'No complete backup in {directory}.')
+        with open(path) as file:
+            manifest = json.load(file)
+        if manifest.get('version') != FORMAT_VERSION:
+            raise CommandError('Unsupported backup version.')
+        return manifest
+
+    def chunks(self, directory, names, executor, workers):
+        """Yield decoded chunks in order, reading a few ahead in threads."""
+        pending = deque()
+        for name in names:
+            pending.append(
+                executor.submit(read_chunk, os.path.join(directory, name))
+            )
+            if len(pending) > workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def restore_model(self, model, info, directory, executor, options):
+        fields = {
+            field.attname: field for field in model._meta.concrete_fields
+        }
+        unknown = set(info['fields']) - fields.keys()
+        if unknown:
+            raise CommandError(
+                f'{model._meta.label} has no fields {sorted(unknown)}; '
+                'migrate the database first.'
+            )
+        for rows in self.chunks(
+            directory, info['chunks'], executor, options['workers']
+        ):
+            model._default_manager.bulk_create(
+                (model(**{
+                    name: fields[name].to_python(value)
+                    for name, value in row.items()
+                }) for row in rows),
+                batch_size=options['batch_size'],
+            )
+
+    def flush(self, models):
+        """Empty the tables of models and the derived data referencing them.
+
+        Plain DELETEs skip the per-row signals and cascades of the ORM;
+        derived data is rebuilt after the restore anyway. Tables of other
+        apps referencing the models, such as group memberships, user
+        permissions and the admin log, are not in the backup and are
+        kept: the restore brings back the same primary keys, and the
+        constraint check at the end fails the restore if any of their
+        rows is left pointing at a missing one. Returns those tables.
+        """
+        tables, kept = [], []
+        for model in reversed(models):
+            related = [
+                relation.through if relation.many_to_many
+                else relation.related_model
+                for relation in model._meta.related_objects
+            ] + [
+                field.remote_field.through
+                for field in model._meta.many_to_many
+            ]
+            for related_model in related:
+                if related_model._meta.app_label in DERIVED_APPS:
+                    tables.append(related_model._meta.db_table)
+                else:
+                    kept.append(related_model._meta.db_table)
+            tables.append(model._meta.db_table)
+        with connection.cursor() as cursor:
+            for table in dict.fromkeys(tables):
+                cursor.execute(
+                    'DELETE FROM %s' % connection.ops.quote_name(table)
+                )
+        return [table for table in dict.fromkeys(kept) if table not in tables]
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        manifest = self.load_manifest(directory)
+        models = [apps.get_model(label) for label in MODELS]
+        if not options['flush'] and any(
+            model._default_manager.exists() for model in models
+        ):
+            raise CommandError(
+                'The database already has data; use --flush to replace it.'
+            )
+
+        started = time.perf_counter()
+        kept = []
+        with transaction.atomic(), connection.constraint_checks_disabled():
+            if options['flush']:
+                kept = self.flush(models)
+            with explicit_dates(models), \
+                    ThreadPoolExecutor(options['workers']) as executor:
+                for label, model in zip(MODELS, models):
+                    self.restore_model(
+                        model, manifest['models'][label], directory,
+                        executor, options
+                    )
+            connection.check_constraints(
+                table_names=[model._meta.db_table for model in models] + kept
+            )
+            sequences = connection.ops.sequence_reset_sql(no_style(), models)
+            with connection.cursor() as cursor:
+                for sql in sequences:
+                    cursor.execute(sql)
+
+        AuthorStats.objects.rebuild()
+        Group.objects.all().recount_posts()
+        feed.rebuild()
+        get_backend().rebuild()
+        cache.clear()
+        elapsed = time.perf_counter() - started
+        total = sum(info['rows'] for info in manifest['models'].values())
+        self.stdout.write(
+            f'Restored {total} rows in {elapsed:.1f} s '
+            f'({total / elapsed if elapsed else 0:.0f} rows/s).'
+        )
@@ -0,0 +1,193 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from faker import Faker
+
+from posts import feed
+from posts.models import (AuthorStats,
+                          Comment,
+                          Follow,
+                          Group,
+                          Post,
+                          User
+                          )
+from posts.search import get_backend
+
+BATCH_SIZE = 5000
+TEXT_POOL_SIZE = 1000
+
+# Готовые размеры набора данных: ci для проверки в CI, full для нагрузки.
+SCALES = {
+    'ci': {
+        'users': 200,
+        'groups': 10,
+        'posts': 5000,
+        'follows': 20,
+        'comments': 10000,
+    },
+    'full': {
+        'users': 100000,
+        'groups': 500,
+        'posts': 1000000,
+        'follows': 100,
+        'comments': 2000000,
+    },
+}
+
+
+@contextmanager
+def explicit_dates(models=(Post, Comment)):
+    """Let bulk inserts set auto_now(_add) dates instead of now()."""
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with generated users, groups, posts, follows '
+        'and comments for load testing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=SCALES,
+            default='ci',
+            help='Preset dataset size; the options below override it.',
+        )
+        for name in ('users', 'groups', 'posts', 'follows', 'comments'):
+            parser.add_argument(f'--{name}', type=int)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def bulk(self, model, objects):
+        started = time.perf_counter()
+        batch = []
+        total = 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{model.__name__}: {total} rows in {elapsed:.1f} s'
+        )
+
+    def handle(self, *args, **options):
+        sizes = dict(SCALES[options['scale']])
+        sizes.update({
+            name: options[name] for name in sizes
+            if options[name] is not None
+        })
+        rng = random.Random(options['seed'])
+        fake = Faker('ru_RU')
+        fake.seed_instance(options['seed'])
+        texts = [fake.paragraph(nb_sentences=4)
+                 for _ in range(TEXT_POOL_SIZE)]
+        now = timezone.now()
+        span = timedelta(days=options['days']).total_seconds()
+
+        def random_date():
+            return now - timedelta(seconds=rng.random() * span)
+
+        prefix = f'seed{options["seed"]}_'
+        password = make_password(None)
+        self.bulk(User, (
+            User(
+                username=f'{prefix}user{i}',
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+                password=password,
+            ) for i in range(sizes['users'])
+        ))
+        self.bulk(Group, (
+            Group(
+                title=f'Группа {i}',
+                slug=f'{prefix}group{i}'[:20],
+                description=rng.choice(texts),
+            ) for i in range(sizes['groups'])
+        ))
+        user_ids = list(User.objects.filter(
+            username__startswith=prefix
+        ).values_list('id', flat=True))
+        group_ids = list(Group.objects.filter(
+            slug__startswith=prefix
+        ).values_list('id', flat=True)) + [None]
+
+        # Popularity follows a power law, so a few authors get most posts
+        # and followers, like on a real site.
+        weights = list(accumulate(
+            1 / (rank + 1) for rank in range(len(user_ids))
+        ))
+        with explicit_dates():
+            self.bulk(Post, (
+                Post(
+                    author_id=rng.choices(user_ids, cum_weights=weights)[0],
+                    group_id=rng.choice(group_ids),
+                    text=rng.choice(texts),
+                    pub_date=pub_date,
+                    updated=pub_date,
+                ) for pub_date in (
+                    random_date() for _ in range(sizes['posts'])
+                )
+            ))
+            follows_per_user = min(sizes['follows'], len(user_ids) - 1)
+            self.bulk(Follow, (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in set(
+                    rng.choices(
+                        user_ids, cum_weights=weights, k=follows_per_user
+                    )
+                )
+                if author_id != user_id
+            ))
+            post_ids = list(Post.objects.filter(
+                author__username__startswith=prefix
+            ).values_list('id', flat=True))
+            self.bulk(Comment, (
+                Comment(
+                    post_id=rng.choice(post_ids),
+                    author_id=rng.choice(user_ids),
+                    text=rng.choice(texts),
+                    created=random_date(),
+                ) for _ in range(sizes['comments'])
+            ))
+
+        # Bulk inserts skip the signals, so derived data is rebuilt here.
+        started = time.perf_counter()
+        Post.objects.all().recount_comments()
+        Group.objects.all().recount_posts()
+        AuthorStats.objects.rebuild()
+        feed.rebuild()
+        get_backend().rebuild()
+        cache.clear()
+        self.stdout.write(
+            'Counters, feeds and search index rebuilt in '
+            f'{time.perf_counter() - started:.1f} s'
+        )
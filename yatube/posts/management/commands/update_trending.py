@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Fold the comments since the previous run into the trending '
+        'ranking. Run it from cron or with --interval.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep running, updating every given number of seconds.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                started = time.perf_counter()
+                ranked = trending.update()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Ranked {ranked} trending posts in {elapsed:.2f} s.'
+                )
+                if not options['interval']:
+                    break
+                time.sleep(max(options['interval'] - elapsed, 0))
+        except KeyboardInterrupt:
+            pass
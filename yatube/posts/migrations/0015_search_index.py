@@ -0,0 +1,37 @@
+from django.db import migrations
+
+INDEX_TABLE = 'posts_search_index'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5('
+        'body, kind UNINDEXED, object_id UNINDEXED, post_id UNINDEXED)'
+    )
+    schema_editor.execute(
+        f"INSERT INTO {INDEX_TABLE} (body, kind, object_id, post_id) "
+        "SELECT text, 'post', id, id FROM posts_post"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {INDEX_TABLE} (body, kind, object_id, post_id) "
+        "SELECT text, 'comment', id, post_id FROM posts_comment"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {INDEX_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_thumbnails'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='Запись')),
+                ('velocity', models.FloatField(default=0, help_text='Число комментариев с экспоненциальным затуханием', verbose_name='Скорость комментирования')),
+                ('score', models.FloatField(default=0, verbose_name='Рейтинг')),
+                ('rank', models.PositiveIntegerField(db_index=True, null=True, verbose_name='Место')),
+                ('computed', models.DateTimeField(verbose_name='Дата расчёта')),
+            ],
+            options={
+                'verbose_name_plural': 'Популярные записи',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created'], name='comment_created_idx'),
+        ),
+    ]
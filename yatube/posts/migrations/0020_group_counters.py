@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:52
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+
+
+def count_posts(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    posts = (
+        Post.objects.filter(group=OuterRef('pk'))
+        .order_by().values('group')
+    )
+    Group.objects.filter(group__isnull=False).update(
+        posts_count=Subquery(
+            posts.annotate(total=Count('pk')).values('total')
+        ),
+        last_post=Subquery(
+            posts.annotate(last=Max('pub_date')).values('last')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последняя запись'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Записей'),
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
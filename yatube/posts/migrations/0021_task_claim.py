@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_group_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='claim',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Захвачена воркером'),
+        ),
+    ]
@@ -1,13 +1,54 @@
-from django.db import models
+import json
+
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
-from django.db.models import CheckConstraint, UniqueConstraint, Q, F
+from django.utils import timezone
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models import (CheckConstraint,
+                              Count,
+                              F,
+                              Max,
+                              OuterRef,
+                              Q,
+                              Subquery,
+                              UniqueConstraint
+                              )
 
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    def recount_comments(self):
+        """Recompute comments_count of the posts with one UPDATE."""
+        counts = (
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by().values('post')
+            .annotate(total=Count('pk')).values('total')
+        )
+        self.update(comments_count=Coalesce(Subquery(counts), 0))
+
+    def for_listing(self):
+        """Posts with the author and group a post card shows.
+
+        Joins both relations into the same query and skips the columns
+        no listing template renders.
+        """
+        return self.select_related('author', 'group').defer(
+            'author__password',
+            'author__last_login',
+            'author__is_superuser',
+            'author__email',
+            'author__is_staff',
+            'author__is_active',
+            'author__date_joined',
+            'group__description',
+        )
+
+
 class Post(models.Model):
     text = models.TextField('Текст записи', help_text='Введите текст записи')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -28,19 +69,96 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False
+    )
+    thumbnails = models.TextField(
+        'Миниатюры',
+        blank=True,
+        editable=False,
+        help_text='URL миниатюр изображения в формате JSON'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = 'Записи'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'),
+                         name='post_pub_date_idx'
+                         ),
+            models.Index(fields=('group', '-pub_date', '-id'),
+                         name='post_group_pub_date_idx'
+                         ),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post_author_pub_date_idx'
+                         ),
+        )
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        """Save the post without writing comments_count back.
+
+        The counter is only moved by UPDATEs of the comment signals, so
+        an update leaves it out and a stale instance cannot overwrite it.
+        """
+        if (not self._state.adding and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comments_count'
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def thumbnail_urls(self):
+        """Return precomputed thumbnail URLs keyed by size name."""
+        try:
+            return json.loads(self.thumbnails)
+        except ValueError:
+            return {}
+
+
+class GroupQuerySet(models.QuerySet):
+    def recount_posts(self):
+        """Recompute the post counters of the groups with one UPDATE."""
+        posts = (
+            Post.objects.filter(group=OuterRef('pk'))
+            .order_by().values('group')
+        )
+        self.update(
+            posts_count=Coalesce(
+                Subquery(posts.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+            last_post=Subquery(
+                posts.annotate(last=Max('pub_date')).values('last')
+            ),
+        )
+
 
 class Group(models.Model):
     title = models.CharField('Группа', max_length=200)
     slug = models.SlugField('Код группы', max_length=20, unique=True)
     description = models.TextField('Описание группы')
+    posts_count = models.PositiveIntegerField(
+        'Записей',
+        default=0,
+        editable=False
+    )
+    last_post = models.DateTimeField(
+        'Последняя запись',
+        blank=True,
+        null=True,
+        editable=False
+    )
+
+    objects = GroupQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = 'Группы'
@@ -72,6 +190,14 @@ class Comment(models.Model):
     class Meta:
         verbose_name_plural = 'Комментарии'
         ordering = ('-created',)
+        indexes = (
+            models.Index(fields=('post', '-created', '-id'),
+                         name='comment_post_created_idx'
+                         ),
+            models.Index(fields=('created',),
+                         name='comment_created_idx'
+                         ),
+        )
 
     def __str__(self):
         return self.text[:15]
@@ -98,7 +224,197 @@ class Follow(models.Model):
                              name='unique_followers'
                              )
         )
+        indexes = (
+            models.Index(fields=('author', 'user'),
+                         name='follow_author_user_idx'
+                         ),
+        )
         verbose_name_plural = 'Подписки'
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}.'
+
+
+class FeedEntry(models.Model):
+    """A post delivered to a follower's feed when it was published."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Запись'
+    )
+
+    class Meta:
+        constraints = (
+            UniqueConstraint(fields=('user', 'post'),
+                             name='unique_feed_entry'
+                             ),
+        )
+        verbose_name_plural = 'Ленты подписок'
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}.'
+
+
+class AuthorStatsManager(models.Manager):
+    def recount(self, user_id):
+        """Count everything from scratch and store the result."""
+        stats, _ = self.update_or_create(
+            user_id=user_id,
+            defaults={
+                'posts_count': Post.objects.filter(
+                    author_id=user_id
+                ).count(),
+                'comments_count': Comment.objects.filter(
+                    author_id=user_id
+                ).count(),
+                'followers_count': Follow.objects.filter(
+                    author_id=user_id
+                ).count(),
+                'following_count': Follow.objects.filter(
+                    user_id=user_id
+                ).count(),
+            }
+        )
+        return stats
+
+    def rebuild(self):
+        """Recount the counters of every user in bulk."""
+        def counts(queryset, field):
+            return dict(
+                queryset.order_by().values(field)
+                .annotate(total=Count('pk'))
+                .values_list(field, 'total')
+            )
+
+        posts = counts(Post.objects, 'author')
+        comments = counts(Comment.objects, 'author')
+        followers = counts(Follow.objects, 'author')
+        following = counts(Follow.objects, 'user')
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(
+                (AuthorStats(
+                    user_id=user_id,
+                    posts_count=posts.get(user_id, 0),
+                    comments_count=comments.get(user_id, 0),
+                    followers_count=followers.get(user_id, 0),
+                    following_count=following.get(user_id, 0),
+                ) for user_id in User.objects.values_list('pk', flat=True)),
+                batch_size=500,
+            )
+
+    def add(self, user_id, **deltas):
+        """Shift the counters of a user by the given deltas.
+
+        The update is a single atomic UPDATE ... SET x = x + delta, so
+        concurrent writers never lose increments. Decrements stop at
+        zero, so a counter that drifted cannot fail its CHECK. A missing
+        row is recounted on increments and left alone on decrements,
+        which happen while the user itself is being deleted.
+        """
+        with transaction.atomic():
+            updated = self.filter(user_id=user_id).update(**{
+                field: F(field) + delta if delta >= 0
+                else Greatest(F(field) + delta, 0)
+                for field, delta in deltas.items()
+            })
+            if not updated and any(delta > 0 for delta in deltas.values()):
+                self.recount(user_id)
+
+    def for_user(self, user):
+        try:
+            return user.stats
+        except AuthorStats.DoesNotExist:
+            return self.recount(user.pk)
+
+
+class AuthorStats(models.Model):
+    """Denormalized per-user counters kept up to date by signals."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Подписчиков',
+        default=0,
+        db_index=True
+    )
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    objects = AuthorStatsManager()
+
+    class Meta:
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'Статистика {self.user}.'
+
+
+class Task(models.Model):
+    """A side effect of a write waiting for the run_tasks worker."""
+    name = models.CharField('Задача', max_length=100)
+    payload = models.TextField(
+        'Параметры',
+        help_text='Параметры задачи в формате JSON'
+    )
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    run_after = models.DateTimeField('Выполнить после', default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    claim = models.CharField(
+        'Захвачена воркером',
+        max_length=32,
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            models.Index(fields=('run_after', 'id'),
+                         name='task_run_after_idx'
+                         ),
+        )
+
+    def __str__(self):
+        return f'{self.name} {self.payload}'
+
+
+class TrendingPost(models.Model):
+    """A post's recent comment velocity and place on the trending page.
+
+    Maintained by the update_trending command, see posts.trending.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Запись'
+    )
+    velocity = models.FloatField(
+        'Скорость комментирования',
+        default=0,
+        help_text='Число комментариев с экспоненциальным затуханием'
+    )
+    score = models.FloatField('Рейтинг', default=0)
+    rank = models.PositiveIntegerField('Место', null=True, db_index=True)
+    computed = models.DateTimeField('Дата расчёта')
+
+    class Meta:
+        verbose_name_plural = 'Популярные записи'
+
+    def __str__(self):
+        return f'{self.post} на месте {self.rank}.'
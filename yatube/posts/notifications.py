@@ -0,0 +1,36 @@
+"""Email notifications sent by the task queue."""
+from django.conf import settings
+from django.core.mail import send_mass_mail
+
+from .models import Comment
+
+COMMENT_SUBJECT = 'Новый комментарий к вашей записи'
+
+
+def comment_message(comment):
+    author = comment.author.get_full_name() or comment.author.username
+    return (
+        f'{author} прокомментировал(а) вашу запись «{comment.post}»:\n\n'
+        f'{comment.text}'
+    )
+
+
+def send_comment_notifications(comment_ids):
+    """Email post authors about new comments over a single connection."""
+    comments = (
+        Comment.objects.filter(pk__in=comment_ids)
+        .exclude(post__author__email='')
+        .select_related('author', 'post__author')
+    )
+    messages = [
+        (
+            COMMENT_SUBJECT,
+            comment_message(comment),
+            settings.DEFAULT_FROM_EMAIL,
+            [comment.post.author.email],
+        )
+        for comment in comments
+        if comment.author_id != comment.post.author_id
+    ]
+    if messages:
+        send_mass_mail(messages, fail_silently=False)
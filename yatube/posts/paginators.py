@@ -0,0 +1,200 @@
+"""Cursor (keyset) pagination for post listings.
+
+Offset pagination costs a COUNT(*) plus an OFFSET scan on every page, so
+deep pages get slower as the table grows. Keyset pagination remembers the
+ordering key of the page boundary instead and asks the database for the
+rows strictly after it, which costs the same on any page.
+"""
+import base64
+import hashlib
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, values):
+    """Pack the direction and boundary key into an opaque url-safe token."""
+    parts = [direction]
+    for value in values:
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        parts.append(str(value))
+    raw = '|'.join(parts).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Unpack a token made by encode_cursor into (direction, raw values)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+    except (ValueError, UnicodeError):
+        raise InvalidCursor(token)
+    direction, *values = raw.split('|')
+    if direction not in (NEXT, PREVIOUS):
+        raise InvalidCursor(token)
+    return direction, values
+
+
+class KeysetPage(Page):
+    """A page addressed by a cursor instead of a page number."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Keyset page of %s>' % len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.cursor_for(NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.cursor_for(PREVIOUS, self.object_list[0])
+
+    def next_page_number(self):
+        """Return the cursor of the next page, which addresses it."""
+        if not self.has_next():
+            raise EmptyPage('That page contains no results')
+        return self.next_cursor
+
+    def previous_page_number(self):
+        """Return the cursor of the previous page, which addresses it."""
+        if not self.has_previous():
+            raise EmptyPage('That page number is less than 1')
+        return self.previous_cursor
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
+
+
+class KeysetPaginator(Paginator):
+    """Paginator seeking on a unique descending key such as (pub_date, id).
+
+    `ordering` lists the fields of the key, most significant first; the
+    last one must be unique. Rows are returned newest first. With
+    `approximate_count` the total is served from the cache and refreshed
+    at most once per `count_timeout` seconds instead of on every page.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('pub_date', 'id'),
+                 approximate_count=False, count_timeout=300):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+        self.approximate_count = approximate_count
+        self.count_timeout = count_timeout
+
+    def _check_object_list_is_ordered(self):
+        # Every page is ordered by the key, whatever the queryset's order.
+        pass
+
+    @cached_property
+    def count(self):
+        if not self.approximate_count:
+            return super().count
+        query = str(self.object_list.order_by().query)
+        key = 'keyset_count:' + hashlib.md5(query.encode()).hexdigest()
+        return cache.get_or_set(
+            key, self.object_list.count, self.count_timeout
+        )
+
+    def cursor_for(self, direction, obj):
+        # Rows of a values() queryset are dicts rather than instances.
+        if isinstance(obj, dict):
+            values = [obj[field] for field in self.ordering]
+        else:
+            values = [getattr(obj, field) for field in self.ordering]
+        return encode_cursor(direction, values)
+
+    def _parse_values(self, raw_values):
+        if len(raw_values) != len(self.ordering):
+            raise InvalidCursor(raw_values)
+        model = self.object_list.model
+        values = []
+        try:
+            for field_name, raw in zip(self.ordering, raw_values):
+                field = model._meta.get_field(field_name)
+                values.append(field.to_python(raw))
+        except Exception:
+            raise InvalidCursor(raw_values)
+        return values
+
+    def _seek(self, values, lookup):
+        """Build `key < values` (or `>`) for a composite key.
+
+        The redundant bound on the first field lets the database start an
+        index range scan at the cursor instead of filtering from the top.
+        """
+        bound = Q(**{f'{self.ordering[0]}__{lookup}e': values[0]})
+        condition = Q()
+        for position, field_name in enumerate(self.ordering):
+            step = Q(**{f'{field_name}__{lookup}': values[position]})
+            for prior, value in zip(self.ordering[:position], values):
+                step &= Q(**{prior: value})
+            condition |= step
+        return bound & condition
+
+    def cursor_page(self, cursor):
+        """Return the KeysetPage for a token, or the first page.
+
+        A missing or malformed token falls back to the first page, the
+        same way Paginator.get_page treats a bad page number.
+        """
+        direction, values = NEXT, None
+        if cursor:
+            try:
+                direction, raw_values = decode_cursor(cursor)
+                values = self._parse_values(raw_values)
+            except InvalidCursor:
+                direction, values = NEXT, None
+
+        descending = [f'-{field}' for field in self.ordering]
+        ascending = list(self.ordering)
+        queryset = self.object_list
+        if values is None:
+            rows = list(queryset.order_by(*descending)[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            return KeysetPage(rows[:self.per_page], self, has_more, False)
+        if direction == NEXT:
+            rows = list(
+                queryset.filter(self._seek(values, 'lt'))
+                .order_by(*descending)[:self.per_page + 1]
+            )
+            has_more = len(rows) > self.per_page
+            return KeysetPage(rows[:self.per_page], self, has_more, True)
+        rows = list(
+            queryset.filter(self._seek(values, 'gt'))
+            .order_by(*ascending)[:self.per_page + 1]
+        )
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(rows, self, True, has_more)
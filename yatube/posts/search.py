@@ -0,0 +1,190 @@
+"""Full-text search over posts and their comments.
+
+Posts and comments are kept in an inverted index that is updated by
+signals whenever they are saved or deleted. The index lives behind a
+small backend interface: SQLite uses an FTS5 virtual table, and any
+other database falls back to LikeSearchBackend until a dedicated backend
+is configured with POSTS_SEARCH_BACKEND.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+
+INDEX_TABLE = 'posts_search_index'
+POST = 'post'
+COMMENT = 'comment'
+
+
+def query_terms(query):
+    """Split user input into plain words, dropping search syntax."""
+    return re.findall(r'\w+', query.lower())
+
+
+class BaseSearchBackend:
+    """Interface every search backend implements."""
+
+    def index_post(self, post):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit):
+        """Return ids of posts matching every word, best match first."""
+        raise NotImplementedError
+
+    def filter_posts(self, queryset, query):
+        """Narrow a Post queryset to every post matching every word."""
+        return queryset.filter(pk__in=self.search(query, None))
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """Unindexed LIKE '%word%' scan, the baseline other backends beat."""
+
+    def matches(self, terms):
+        condition = Q()
+        for term in terms:
+            condition &= (
+                Q(text__icontains=term) | Q(comments__text__icontains=term)
+            )
+        return Post.objects.filter(condition).values_list('id', flat=True)
+
+    def search(self, query, limit):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        return list(self.matches(terms).distinct()[:limit])
+
+    def filter_posts(self, queryset, query):
+        terms = query_terms(query)
+        if not terms:
+            return queryset.none()
+        return queryset.filter(pk__in=self.matches(terms))
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """Inverted index in an SQLite FTS5 table ranked by bm25."""
+
+    def _upsert(self, kind, object_id, post_id, body):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {INDEX_TABLE} '
+                'WHERE kind = %s AND object_id = %s',
+                [kind, object_id]
+            )
+            cursor.execute(
+                f'INSERT INTO {INDEX_TABLE} '
+                '(body, kind, object_id, post_id) VALUES (%s, %s, %s, %s)',
+                [body, kind, object_id, post_id]
+            )
+
+    def index_post(self, post):
+        self._upsert(POST, post.pk, post.pk, post.text)
+
+    def index_comment(self, comment):
+        self._upsert(COMMENT, comment.pk, comment.post_id, comment.text)
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {INDEX_TABLE} WHERE post_id = %s', [post_id]
+            )
+
+    def remove_comment(self, comment_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {INDEX_TABLE} '
+                'WHERE kind = %s AND object_id = %s',
+                [COMMENT, comment_id]
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {INDEX_TABLE} (body, kind, object_id, post_id) '
+                f'SELECT text, %s, id, id FROM {Post._meta.db_table}',
+                [POST]
+            )
+            cursor.execute(
+                f'INSERT INTO {INDEX_TABLE} (body, kind, object_id, post_id) '
+                f'SELECT text, %s, id, post_id FROM {Comment._meta.db_table}',
+                [COMMENT]
+            )
+
+    def match(self, terms):
+        # Every word is quoted, so user input never reaches FTS syntax.
+        return ' '.join('"%s"' % term for term in terms)
+
+    def search(self, query, limit):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        match = self.match(terms)
+        post_ids = []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM {INDEX_TABLE} '
+                f'WHERE {INDEX_TABLE} MATCH %s ORDER BY rank',
+                [match]
+            )
+            # A post ranks by its best matching row: itself or a comment.
+            for (post_id,) in cursor:
+                if post_id not in post_ids:
+                    post_ids.append(post_id)
+                    if len(post_ids) == limit:
+                        break
+        return post_ids
+
+    def filter_posts(self, queryset, query):
+        terms = query_terms(query)
+        if not terms:
+            return queryset.none()
+        # pk__in=RawSQL(...) would wrap the subquery in a second pair of
+        # parentheses, which turns it into a single-row scalar subquery.
+        return queryset.extra(
+            where=[
+                f'{Post._meta.db_table}.id IN (SELECT post_id '
+                f'FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s)'
+            ],
+            params=[self.match(terms)],
+        )
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'POSTS_SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'sqlite':
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = LikeSearchBackend()
+    return _backend
+
+
+def search_posts(query, limit=None):
+    """Return matching posts for listing, ordered by rank."""
+    if limit is None:
+        limit = getattr(settings, 'POSTS_SEARCH_LIMIT', 100)
+    post_ids = get_backend().search(query, limit)
+    posts = Post.objects.for_listing().in_bulk(post_ids)
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
@@ -0,0 +1,252 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, feed, notifications, search, tasks, thumbnails
+from .groups import GROUPS
+from .models import AuthorStats, Comment, Follow, Group, Post
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.add(instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    AuthorStats.objects.add(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def count_group_posts(sender, instance, created, **kwargs):
+    if created:
+        if not instance.group_id:
+            return
+        Group.objects.filter(pk=instance.group_id).update(
+            posts_count=F('posts_count') + 1, last_post=instance.pub_date
+        )
+    else:
+        old_group_id = getattr(instance, '_old_group_id', None)
+        if old_group_id == instance.group_id:
+            return
+        Group.objects.filter(
+            pk__in=(old_group_id, instance.group_id)
+        ).recount_posts()
+    tasks.enqueue('bump', scopes=[GROUPS])
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_group_post(sender, instance, **kwargs):
+    if instance.group_id:
+        # The deleted post may have been the latest one of the group.
+        Group.objects.filter(pk=instance.group_id).recount_posts()
+        tasks.enqueue('bump', scopes=[GROUPS])
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.add(instance.author_id, comments_count=1)
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=F('comments_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    AuthorStats.objects.add(instance.author_id, comments_count=-1)
+    Post.objects.filter(pk=instance.post_id).update(
+        comments_count=Greatest(F('comments_count') - 1, 0)
+    )
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.add(instance.author_id, followers_count=1)
+        AuthorStats.objects.add(instance.user_id, following_count=1)
+        feed.crossed_fanout_limit(instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    AuthorStats.objects.add(instance.author_id, followers_count=-1)
+    AuthorStats.objects.add(instance.user_id, following_count=-1)
+    if feed.crossed_fanout_limit(instance.author_id, -1):
+        tasks.enqueue('backfill_followers', author_id=instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, **kwargs):
+    instance._old_group_id = instance._old_group_slug = None
+    if instance.pk:
+        instance._old_group_id, instance._old_group_slug = (
+            Post.objects.filter(pk=instance.pk, group__isnull=False)
+            .values_list('group_id', 'group__slug')
+            .first()
+        ) or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        tasks.enqueue('fan_out', post_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    scopes = caching.post_scopes(instance)
+    old_group_slug = getattr(instance, '_old_group_slug', None)
+    if old_group_slug:
+        scopes.append(caching.group_scope(old_group_slug))
+    tasks.enqueue('bump', scopes=scopes)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_pages(sender, instance, **kwargs):
+    tasks.enqueue('bump', scopes=caching.post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    tasks.enqueue('bump', scopes=[caching.post_scope(instance.post_id)])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    tasks.enqueue('bump', scopes=[
+        caching.GLOBAL, GROUPS, caching.group_scope(instance.slug)
+    ])
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        tasks.enqueue(
+            'backfill', user_id=instance.user_id, author_id=instance.author_id
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def prune_feed(sender, instance, **kwargs):
+    tasks.enqueue(
+        'prune', user_id=instance.user_id, author_id=instance.author_id
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, **kwargs):
+    # The follower's profile shows how many authors they follow.
+    tasks.enqueue('bump', scopes=[
+        caching.author_scope(instance.author.username),
+        caching.author_scope(instance.user.username),
+    ])
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    tasks.enqueue('index_post', post_id=instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    tasks.enqueue('remove_post', post_id=instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    tasks.enqueue('index_comment', comment_id=instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    tasks.enqueue('remove_comment', comment_id=instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def notify_post_author(sender, instance, created, **kwargs):
+    if created:
+        tasks.enqueue('notify_comment', comment_id=instance.pk)
+
+
+# Task handlers. They receive every payload of a batch and load rows by
+# id, so a task whose row was changed or deleted since is still safe.
+
+@tasks.handler('bump')
+def bump_scopes(payloads):
+    scopes = {scope for payload in payloads for scope in payload['scopes']}
+    caching.bump(*scopes)
+
+
+@tasks.handler('fan_out')
+def fan_out_posts(payloads):
+    post_ids = [payload['post_id'] for payload in payloads]
+    for post in Post.objects.filter(pk__in=post_ids):
+        feed.fan_out(post)
+
+
+@tasks.handler('backfill')
+def backfill_feeds(payloads):
+    for payload in payloads:
+        if Follow.objects.filter(**payload).exists():
+            feed.backfill(payload['user_id'], payload['author_id'])
+
+
+@tasks.handler('backfill_followers')
+def backfill_followers(payloads):
+    for author_id in {payload['author_id'] for payload in payloads}:
+        feed.backfill_followers(author_id)
+
+
+@tasks.handler('prune')
+def prune_feeds(payloads):
+    for payload in payloads:
+        if not Follow.objects.filter(**payload).exists():
+            feed.prune(payload['user_id'], payload['author_id'])
+
+
+@tasks.handler('index_post')
+def index_posts(payloads):
+    backend = search.get_backend()
+    post_ids = [payload['post_id'] for payload in payloads]
+    for post in Post.objects.filter(pk__in=post_ids).only('id', 'text'):
+        backend.index_post(post)
+
+
+@tasks.handler('remove_post')
+def remove_posts(payloads):
+    backend = search.get_backend()
+    for payload in payloads:
+        backend.remove_post(payload['post_id'])
+
+
+@tasks.handler('index_comment')
+def index_comments(payloads):
+    backend = search.get_backend()
+    comment_ids = [payload['comment_id'] for payload in payloads]
+    for comment in Comment.objects.filter(pk__in=comment_ids):
+        backend.index_comment(comment)
+
+
+@tasks.handler('remove_comment')
+def remove_comments(payloads):
+    backend = search.get_backend()
+    for payload in payloads:
+        backend.remove_comment(payload['comment_id'])
+
+
+@tasks.handler('generate_thumbnails')
+def generate_thumbnails(payloads):
+    for payload in payloads:
+        thumbnails.generate(payload['post_id'])
+
+
+@tasks.handler('notify_comment')
+def notify_comments(payloads):
+    comment_ids = [payload['comment_id'] for payload in payloads]
+    notifications.send_comment_notifications(comment_ids)
@@ -0,0 +1,140 @@
+"""Database-backed queue for the side effects of writes.
+
+Feed fan-out, search indexing, cache invalidation, thumbnails and
+notification emails are enqueued as Task rows in the same transaction as
+the write, so the request returns as soon as the write is committed and
+no broker is needed. The run_tasks worker leases due tasks in batches,
+runs every handler once per batch with all of its payloads, and puts
+failed tasks back with a growing delay. Several workers can run side by
+side: each one only runs the tasks it leased.
+
+With POSTS_TASKS_EAGER the handlers run inline instead, which is the
+default outside production and what the tests rely on.
+"""
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def handler(name):
+    """Register a function taking a list of payloads as task `name`."""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def is_eager():
+    return getattr(settings, 'POSTS_TASKS_EAGER', True)
+
+
+def enqueue(name, **payload):
+    """Queue a task, or run it right away in eager mode."""
+    if name not in _handlers:
+        raise KeyError(f'Unknown task {name!r}')
+    if is_eager():
+        _handlers[name]([payload])
+        return
+    Task.objects.create(name=name, payload=json.dumps(payload, sort_keys=True))
+
+
+def claim_batch(limit, now):
+    """Lease up to `limit` due tasks to this worker and return them.
+
+    The claim is a short UPDATE committed before any handler runs, so
+    no transaction stays open while emails are sent or thumbnails are
+    rendered. A claimed task's run_after moves to the end of its lease:
+    other workers skip it, and if this worker dies the task becomes due
+    again once the lease runs out.
+    """
+    max_attempts = getattr(settings, 'POSTS_TASKS_MAX_ATTEMPTS', 5)
+    lease = getattr(settings, 'POSTS_TASKS_LEASE', 300)
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(
+            Task.objects.filter(run_after__lte=now, attempts__lt=max_attempts)
+            .order_by('id').values_list('pk', flat=True)[:limit]
+        )
+        # run_after is checked again, so a task another worker claimed
+        # between the two statements is left to it.
+        Task.objects.filter(pk__in=ids, run_after__lte=now).update(
+            claim=token, run_after=now + timedelta(seconds=lease)
+        )
+    return list(Task.objects.filter(pk__in=ids, claim=token).order_by('id'))
+
+
+def fail(tasks, error, now):
+    """Put tasks back in the queue with a delay growing with attempts."""
+    logger.error('Task %s failed', tasks[0].name, exc_info=error)
+    delay = getattr(settings, 'POSTS_TASKS_RETRY_DELAY', 60)
+    Task.objects.filter(
+        pk__in=[task.pk for task in tasks], claim=tasks[0].claim
+    ).update(
+        attempts=F('attempts') + 1,
+        run_after=now + timedelta(seconds=delay * (tasks[0].attempts + 1)),
+        last_error=repr(error),
+        claim='',
+    )
+
+
+def run_group(name, tasks, now):
+    """Run the tasks of one handler and return the ids of those done.
+
+    All payloads go to the handler at once. If that fails, they are run
+    one at a time, so only the tasks whose own payload fails are
+    retried and the rest of the batch is not held back by them.
+    """
+    # Identical payloads, such as two edits of one post, run once.
+    payloads = OrderedDict()
+    for task in tasks:
+        payloads.setdefault(task.payload, []).append(task)
+    try:
+        with transaction.atomic():
+            _handlers[name]([json.loads(key) for key in payloads])
+        return [task.pk for task in tasks]
+    except Exception:
+        if len(payloads) == 1:
+            raise
+    done = []
+    for key, same_tasks in payloads.items():
+        try:
+            with transaction.atomic():
+                _handlers[name]([json.loads(key)])
+        except Exception as error:
+            fail(same_tasks, error, now)
+        else:
+            done += [task.pk for task in same_tasks]
+    return done
+
+
+def run_batch(limit=None):
+    """Run the due tasks of one batch and return how many were claimed."""
+    if limit is None:
+        limit = getattr(settings, 'POSTS_TASKS_BATCH_SIZE', 100)
+    now = timezone.now()
+    batch = claim_batch(limit, now)
+    groups = OrderedDict()
+    for task in batch:
+        groups.setdefault(task.name, []).append(task)
+    done = []
+    for name, tasks in groups.items():
+        try:
+            done += run_group(name, tasks, now)
+        except Exception as error:
+            fail(tasks, error, now)
+    if batch:
+        Task.objects.filter(pk__in=done, claim=batch[0].claim).delete()
+    return len(batch)
@@ -0,0 +1,129 @@
+"""Тестирование JSON API приложения posts."""
+import warnings
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+AUTHOR = 'PostAuthor'
+FOLLOWER = 'Follower'
+SLUG = 'test_group'
+POSTS = 15
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.follower = User.objects.create_user(username=FOLLOWER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание'
+        )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group,
+                text=f'Запись {number}',
+            )
+            for number in range(POSTS)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0],
+            author=cls.follower,
+            text='Комментарий',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_post_list_pages(self):
+        """Курсоры next и previous проходят список записей без пропусков."""
+        url = reverse('api:post_list')
+        first = self.client.get(url, {'limit': 10}).json()
+        self.assertEqual(len(first['results']), 10)
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(second['results']), POSTS - 10)
+        self.assertIsNone(second['next'])
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_post_list_single_query(self):
+        """Страница списка записей читается одним запросом."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:post_list'))
+
+    def test_sparse_fields(self):
+        """Параметр fields ограничивает набор полей ответа."""
+        response = self.client.get(
+            reverse('api:post_detail', args=(self.posts[0].id,)),
+            {'fields': 'id,author,group'}
+        )
+        self.assertEqual(response.json(), {
+            'id': self.posts[0].id,
+            'author': AUTHOR,
+            'group': SLUG,
+        })
+        response = self.client.get(
+            reverse('api:post_list'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_etag(self):
+        """Повторный запрос с If-None-Match получает ответ 304."""
+        url = reverse('api:group_detail', args=(SLUG,))
+        response = self.client.get(url)
+        self.assertEqual(response.json()['slug'], SLUG)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Group.objects.filter(slug=SLUG).update(title='Новое название')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comments(self):
+        """Комментарии доступны списком у записи и по отдельности."""
+        response = self.client.get(
+            reverse('api:post_comments', args=(self.posts[0].id,))
+        )
+        self.assertEqual(
+            [comment['id'] for comment in response.json()['results']],
+            [self.comment.id]
+        )
+        response = self.client.get(
+            reverse('api:comment_detail', args=(self.comment.id,))
+        )
+        self.assertEqual(response.json()['author'], FOLLOWER)
+        response = self.client.get(
+            reverse('api:post_comments', args=(0,))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_group_list(self):
+        """Список групп упорядочен по убыванию id без предупреждений."""
+        other = Group.objects.create(title='Другая группа', slug='other')
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            response = self.client.get(reverse('api:group_list'))
+        self.assertEqual(
+            [group['slug'] for group in response.json()['results']],
+            [other.slug, SLUG]
+        )
+
+    def test_feed(self):
+        """Лента доступна только авторизованному пользователю."""
+        url = reverse('api:feed')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.follower)
+        response = self.client.get(url, {'fields': 'id'})
+        self.assertEqual(len(response.json()['results']), 10)
+        self.assertIn('private', response['Cache-Control'])
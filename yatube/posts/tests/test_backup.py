@@ -0,0 +1,97 @@
+"""Тестирование резервного копирования данных приложения posts."""
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth.models import Group as UserGroup, Permission
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..models import Comment, FeedEntry, Follow, Group, Post, User
+
+
+class BackupTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='PostAuthor')
+        follower = User.objects.create_user(username='Follower')
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание'
+        )
+        Follow.objects.create(user=follower, author=author)
+        for i in range(5):
+            post = Post.objects.create(
+                author=author, text=f'Запись {i}', group=group
+            )
+            Comment.objects.create(
+                post=post, author=follower, text=f'Комментарий {i}'
+            )
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def snapshot(self):
+        return {
+            model: list(model.objects.order_by('pk').values())
+            for model in (User, Group, Post, Comment, Follow)
+        }
+
+    def test_backup_and_restore(self):
+        """Восстановление из копии возвращает те же данные."""
+        before = self.snapshot()
+        call_command(
+            'backup_posts', self.dir, chunk_size=2, stdout=StringIO()
+        )
+        Post.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('restore_posts', self.dir, stdout=StringIO())
+
+        call_command(
+            'restore_posts', self.dir, flush=True, stdout=StringIO()
+        )
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(FeedEntry.objects.count(), 5)
+        self.assertEqual(User.objects.get(username='PostAuthor')
+                         .stats.posts_count, 5)
+
+    def test_restore_recounts_groups(self):
+        """Счётчики групп пересчитываются после восстановления."""
+        Group.objects.update(posts_count=0, last_post=None)
+        call_command('backup_posts', self.dir, stdout=StringIO())
+        call_command(
+            'restore_posts', self.dir, flush=True, stdout=StringIO()
+        )
+        group = Group.objects.get()
+        self.assertEqual(group.posts_count, 5)
+        self.assertEqual(
+            group.last_post, Post.objects.latest('pub_date').pub_date
+        )
+
+    def test_flush_keeps_other_apps_data(self):
+        """Восстановление не стирает членство в группах, права и журнал."""
+        author = User.objects.get(username='PostAuthor')
+        editors = UserGroup.objects.create(name='Редакторы')
+        author.groups.add(editors)
+        author.user_permissions.add(Permission.objects.first())
+        LogEntry.objects.log_action(
+            author.pk, None, Post.objects.first().pk, 'Запись', ADDITION
+        )
+        call_command('backup_posts', self.dir, stdout=StringIO())
+        call_command(
+            'restore_posts', self.dir, flush=True, stdout=StringIO()
+        )
+        author = User.objects.get(username='PostAuthor')
+        self.assertEqual(list(author.groups.all()), [editors])
+        self.assertEqual(author.user_permissions.count(), 1)
+        self.assertEqual(LogEntry.objects.filter(user=author).count(), 1)
+
+    def test_incomplete_backup(self):
+        """Копия без манифеста не восстанавливается."""
+        with self.assertRaises(CommandError):
+            call_command('restore_posts', self.dir, stdout=StringIO())
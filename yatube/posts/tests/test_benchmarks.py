@@ -0,0 +1,39 @@
+"""Тестирование команд наполнения базы и замеров производительности."""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import AuthorStats, Comment, FeedEntry, Follow, Post
+
+
+class BenchmarkCommandsTest(TestCase):
+    def test_seed_data(self):
+        """seed_data создаёт данные и пересчитывает производные таблицы."""
+        call_command(
+            'seed_data', users=20, groups=3, posts=200, follows=5,
+            comments=300, stdout=StringIO()
+        )
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(FeedEntry.objects.exists())
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('posts_count', flat=True)),
+            200
+        )
+        post = Post.objects.order_by('-comments_count').first()
+        self.assertEqual(post.comments_count, post.comments.count())
+
+    def test_benchmark_views(self):
+        """benchmark_views выводит замеры по каждому представлению."""
+        call_command(
+            'seed_data', users=20, groups=3, posts=50, follows=5,
+            comments=50, stdout=StringIO()
+        )
+        out = StringIO()
+        call_command(
+            'benchmark_views', requests=2, memory_samples=1, stdout=out
+        )
+        for view in ('posts:index', 'posts:post_detail', 'posts:add_comment'):
+            self.assertIn(view, out.getvalue())
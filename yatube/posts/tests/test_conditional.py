@@ -0,0 +1,95 @@
+"""Тестирование условных GET-запросов страниц приложения posts."""
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+AUTHOR = 'PostAuthor'
+SLUG = 'test_group'
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовая запись',
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:group_list', args=(SLUG,)),
+            reverse('posts:profile', args=(AUTHOR,)),
+            reverse('posts:post_detail', args=(cls.post.id,)),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def validators(self, url):
+        # Первый показ записи запоминает её автора для валидаторов.
+        self.client.get(url)
+        return self.client.get(url)
+
+    def test_not_modified(self):
+        """Неизменённая страница отдаётся ответом 304 без запросов к БД."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.validators(url)
+                with self.assertNumQueries(0):
+                    by_etag = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                    by_date = self.client.get(
+                        url,
+                        HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                    )
+                self.assertEqual(by_etag.status_code, 304)
+                self.assertEqual(by_date.status_code, 304)
+
+    def test_modified_after_change(self):
+        """Изменение записи или новый комментарий меняют ETag страниц."""
+        etags = {url: self.validators(url)['ETag'] for url in self.urls}
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        self.post.text = 'Изменённая запись'
+        self.post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_follow_changes_both_profiles(self):
+        """Подписка меняет профили автора и подписчика."""
+        follower = User.objects.create_user(username='Follower')
+        urls = (
+            reverse('posts:profile', args=(AUTHOR,)),
+            reverse('posts:profile', args=(follower.username,)),
+        )
+        pages = {url: self.validators(url) for url in urls}
+        Follow.objects.create(user=follower, author=self.author)
+        for url, page in pages.items():
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=page['ETag']
+                )
+                self.assertEqual(response.status_code, 200)
+        self.assertContains(self.client.get(urls[1]), 'подписок: 1')
+
+    def test_user_specific_etag(self):
+        """Страницы разных пользователей имеют разные ETag."""
+        url = self.urls[2]
+        anonymous = self.validators(url)
+        self.client.force_login(self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=anonymous['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
@@ -0,0 +1,80 @@
+"""Тестирование ленты подписок приложения posts."""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..feed import HEAVY_AUTHORS_KEY, feed_posts
+from ..models import FeedEntry, Follow, Post, User
+
+FOLLOWER = 'Follower'
+AUTHOR = 'PostAuthor'
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.follower = User.objects.create_user(username=FOLLOWER)
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Запись до подписки',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_backfill_on_follow(self):
+        """При подписке в ленту попадают уже опубликованные записи."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(list(feed_posts(self.follower)), [self.old_post])
+
+    def test_fan_out_on_post(self):
+        """Новая запись автора доставляется в ленты подписчиков."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новая')
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=self.follower, post=new_post
+            ).exists()
+        )
+        self.assertEqual(feed_posts(self.follower)[0], new_post)
+
+    def test_prune_on_unfollow(self):
+        """При отписке записи автора удаляются из ленты."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        Follow.objects.filter(
+            user=self.follower, author=self.author
+        ).delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.follower))
+        self.assertFalse(feed_posts(self.follower).exists())
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_heavy_author_read_on_fan_out(self):
+        """Записи популярных авторов читаются без материализации."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новая')
+        self.assertFalse(FeedEntry.objects.filter(user=self.follower))
+        cache.delete(HEAVY_AUTHORS_KEY)
+        self.assertEqual(
+            list(feed_posts(self.follower)),
+            [new_post, self.old_post]
+        )
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_author_crossing_fanout_limit(self):
+        """Записи остаются в ленте, когда автор теряет популярность."""
+        other = User.objects.create_user(username='Other')
+        Follow.objects.create(user=self.follower, author=self.author)
+        feed_posts(self.follower)
+        Follow.objects.create(user=other, author=self.author)
+        heavy_post = Post.objects.create(author=self.author, text='Новая')
+        self.assertFalse(FeedEntry.objects.filter(post=heavy_post))
+        self.assertEqual(feed_posts(self.follower)[0], heavy_post)
+
+        Follow.objects.filter(user=other).delete()
+        self.assertEqual(
+            list(feed_posts(self.follower)), [heavy_post, self.old_post]
+        )
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.follower, post=heavy_post)
+        )
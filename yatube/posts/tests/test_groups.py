@@ -0,0 +1,98 @@
+"""Тестирование счётчиков записей групп и реестра групп."""
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..groups import registry
+from ..models import Group, Post, User
+
+GROUPS_PAGE = reverse('posts:groups')
+
+
+class GroupCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='PostAuthor')
+        cls.group = Group.objects.create(
+            title='Первая группа', slug='first', description='Описание'
+        )
+        cls.other = Group.objects.create(
+            title='Вторая группа', slug='second', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertCounters(self, group, posts_count, last_post):
+        group.refresh_from_db()
+        self.assertEqual(group.posts_count, posts_count)
+        self.assertEqual(group.last_post, last_post)
+
+    def test_counters_follow_posts(self):
+        """Счётчик и дата последней записи следуют за записями группы."""
+        first = Post.objects.create(
+            author=self.author, text='Первая', group=self.group
+        )
+        second = Post.objects.create(
+            author=self.author, text='Вторая', group=self.group
+        )
+        self.assertCounters(self.group, 2, second.pub_date)
+
+        second.group = self.other
+        second.save()
+        self.assertCounters(self.group, 1, first.pub_date)
+        self.assertCounters(self.other, 1, second.pub_date)
+
+        first.delete()
+        self.assertCounters(self.group, 0, None)
+
+    def test_registry_follows_changes(self):
+        """Реестр перечитывает группы после их изменения."""
+        self.assertEqual(registry.get('first'), self.group)
+        self.assertEqual(registry.get('first').posts_count, 0)
+        Post.objects.create(
+            author=self.author, text='Запись', group=self.group
+        )
+        self.assertEqual(registry.get('first').posts_count, 1)
+
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(registry.get('first').title, 'Новое название')
+        self.assertEqual(
+            [group.slug for group in registry.all()], ['second', 'first']
+        )
+        self.assertIsNone(registry.get('missing'))
+
+    def test_groups_page_without_queries(self):
+        """Список групп выводится из реестра без запросов к базе."""
+        Post.objects.create(
+            author=self.author, text='Запись', group=self.other
+        )
+        client = Client()
+        client.get(GROUPS_PAGE)
+        with self.assertNumQueries(0):
+            response = client.get(GROUPS_PAGE)
+        self.assertEqual(
+            list(response.context['groups']), [self.other, self.group]
+        )
+        self.assertContains(response, 'Записей: 1')
+
+    def test_group_page_from_registry(self):
+        """Страница группы берёт группу из реестра."""
+        Post.objects.create(
+            author=self.author, text='Запись', group=self.group
+        )
+        client = Client()
+        url = reverse('posts:group_list', kwargs={'slug': 'first'})
+        registry.all()
+        # Только число записей и сами записи, без запроса группы.
+        with self.assertNumQueries(2):
+            response = client.get(url)
+        self.assertEqual(response.context['group'], self.group)
+        self.assertEqual(
+            client.get(
+                reverse('posts:group_list', kwargs={'slug': 'missing'})
+            ).status_code,
+            404
+        )
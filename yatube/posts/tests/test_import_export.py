@@ -0,0 +1,163 @@
+"""Тестирование команд импорта и экспорта записей."""
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from ..feed import feed_posts
+from ..models import AuthorStats, Follow, Group, Post, User
+from ..search import search_posts
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='PostAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание'
+        )
+        Post.objects.create(
+            author=cls.author,
+            text='Запись с картинкой,\nв две строки',
+            group=cls.group,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=SMALL_GIF,
+                content_type='image/gif'
+            ),
+        )
+        Post.objects.create(author=cls.author, text='Запись без группы')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def export(self, name):
+        path = os.path.join(self.dir, name)
+        call_command('export_posts', path, stderr=StringIO())
+        return path
+
+    def snapshot(self):
+        return list(Post.objects.order_by('text').values_list(
+            'author__username', 'group__slug', 'text', 'pub_date', 'image'
+        ))
+
+    def test_round_trip(self):
+        """Импорт экспортированного файла восстанавливает записи."""
+        before = self.snapshot()
+        for name in ('posts.ndjson', 'posts.csv'):
+            with self.subTest(name=name):
+                path = self.export(name)
+                Post.objects.all().delete()
+                call_command(
+                    'import_posts', path, batch_size=1, stdout=StringIO()
+                )
+                self.assertEqual(self.snapshot(), before)
+                self.assertEqual(self.author.stats.posts_count, 2)
+                self.group.refresh_from_db()
+                self.assertEqual(self.group.posts_count, 1)
+
+    def test_missing_authors(self):
+        """Неизвестные авторы пропускаются или создаются по флагу."""
+        path = os.path.join(self.dir, 'posts.ndjson')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(json.dumps({
+                'author': 'NewAuthor',
+                'group': 'new_group',
+                'text': 'Запись нового автора',
+                'pub_date': '2022-03-01T10:00:00+00:00',
+                'image': '',
+            }) + '\n')
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(author__username='NewAuthor'))
+
+        call_command(
+            'import_posts', path, create_missing=True, stdout=StringIO()
+        )
+        post = Post.objects.get(author__username='NewAuthor')
+        self.assertEqual(post.group.slug, 'new_group')
+        self.assertEqual(post.group.posts_count, 1)
+        self.assertEqual(post.group.last_post, post.pub_date)
+        self.assertFalse(post.author.has_usable_password())
+
+    def write(self, *rows):
+        path = os.path.join(self.dir, 'posts.ndjson')
+        with open(path, 'w', encoding='utf-8') as file:
+            for row in rows:
+                file.write(json.dumps({
+                    'author': self.author.username,
+                    'group': self.group.slug,
+                    'text': 'Импортированная запись',
+                    'pub_date': '2022-03-01T10:00:00+00:00',
+                    'image': '',
+                    **row,
+                }) + '\n')
+        return path
+
+    def test_invalid_pub_date(self):
+        """Неверная дата публикации останавливает импорт с номером строки."""
+        for pub_date in ('вчера', '2022-13-45T10:00:00', ''):
+            with self.subTest(pub_date=pub_date):
+                path = self.write({}, {'pub_date': pub_date})
+                with self.assertRaisesMessage(CommandError, 'Line 2'):
+                    call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_import_updates_only_touched_data(self):
+        """Импорт обновляет ленты, индекс и счётчики, не очищая кэш."""
+        follower = User.objects.create_user(username='Follower')
+        Follow.objects.create(user=follower, author=self.author)
+        cache.set('unrelated', 1)
+        call_command('import_posts', self.write({}), stdout=StringIO())
+        post = Post.objects.get(text='Импортированная запись')
+        self.assertEqual(cache.get('unrelated'), 1)
+        self.assertIn(post, feed_posts(follower))
+        self.assertEqual(search_posts('импортированная'), [post])
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 3
+        )
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 2)
+
+    def test_partial_import_updates_derived_data(self):
+        """Записи, вставленные до ошибочной строки, получают счётчики."""
+        follower = User.objects.create_user(username='Follower')
+        Follow.objects.create(user=follower, author=self.author)
+        path = self.write({}, {'pub_date': 'вчера'})
+        with self.assertRaisesMessage(CommandError, 'Line 2'):
+            call_command(
+                'import_posts', path, batch_size=1, stdout=StringIO()
+            )
+        post = Post.objects.get(text='Импортированная запись')
+        self.assertIn(post, feed_posts(follower))
+        self.assertEqual(search_posts('импортированная'), [post])
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 3
+        )
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 2)
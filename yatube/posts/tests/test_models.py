@@ -1,7 +1,7 @@
 """Тестирование моделей приложения posts."""
 from django.test import TestCase
 
-from ..models import Comment, Follow, Group, Post, User
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
 
 USER = 'AuthUser'
 AUTHOR = 'PostAuthor'
@@ -118,3 +118,69 @@ class ModelsTest(TestCase):
         }
         for object_name, str_view in object_names.items():
             self.assertEqual(object_name, str_view)
+
+
+class AuthorStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER)
+        cls.author = User.objects.create_user(username=AUTHOR)
+
+    def get_stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_counters_follow_changes(self):
+        """Счётчики автора меняются при создании и удалении объектов."""
+        post = Post.objects.create(author=self.author, text='Запись')
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Комментарий'
+        )
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        author_stats = self.get_stats(self.author)
+        user_stats = self.get_stats(self.user)
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(user_stats.comments_count, 1)
+        self.assertEqual(user_stats.following_count, 1)
+
+        follow.delete()
+        comment.delete()
+        post.delete()
+        author_stats = self.get_stats(self.author)
+        user_stats = self.get_stats(self.user)
+        self.assertEqual(author_stats.posts_count, 0)
+        self.assertEqual(author_stats.followers_count, 0)
+        self.assertEqual(user_stats.comments_count, 0)
+        self.assertEqual(user_stats.following_count, 0)
+
+    def test_missing_stats_are_recounted(self):
+        """Отсутствующая статистика пересчитывается по данным в базе."""
+        Post.objects.create(author=self.author, text='Запись')
+        AuthorStats.objects.filter(user=self.author).delete()
+        Post.objects.create(author=self.author, text='Запись')
+        self.assertEqual(self.get_stats(self.author).posts_count, 2)
+
+    def test_edited_post_keeps_comments_count(self):
+        """Сохранение устаревшей записи не затирает число комментариев."""
+        writer = User.objects.create_user(username='Writer')
+        post = Post.objects.create(author=writer, text='Запись')
+        Comment.objects.create(
+            post=post, author=self.user, text='Комментарий'
+        )
+        post.text = 'Исправленная запись'
+        post.save()
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.text, 'Исправленная запись')
+        self.assertEqual(post.comments_count, 1)
+
+        writer.delete()
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        self.assertEqual(self.get_stats(self.user).comments_count, 0)
+
+    def test_decrements_stop_at_zero(self):
+        """Разошедшиеся счётчики не уходят ниже нуля при удалении."""
+        post = Post.objects.create(author=self.author, text='Запись')
+        AuthorStats.objects.filter(user=self.author).update(posts_count=0)
+        post.delete()
+        self.assertEqual(self.get_stats(self.author).posts_count, 0)
@@ -0,0 +1,121 @@
+"""Тестирование курсорной пагинации приложения posts."""
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post, User
+from ..paginators import KeysetPaginator
+
+MAIN_PAGE = reverse('posts:index')
+SLUG = 'test_group'
+GROUP_PAGE = reverse('posts:group_list', kwargs={'slug': SLUG})
+AUTHOR = 'PostAuthor'
+AUTHOR_PAGE = reverse('posts:profile', kwargs={'username': AUTHOR})
+NUMBER_OF_POSTS = 13
+PAGE_SIZE = 10
+
+
+@override_settings(POSTS_PAGINATION='keyset')
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание'
+        )
+        for i in range(1, NUMBER_OF_POSTS + 1):
+            Post.objects.create(
+                author=cls.author,
+                text=f'Тестовая запись {i}',
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_cursor_pages(self):
+        """Курсор ведёт на следующую и обратно на предыдущую страницу."""
+        for address in (MAIN_PAGE, GROUP_PAGE, AUTHOR_PAGE):
+            with self.subTest(address=address):
+                first_page = self.guest_client.get(address).context[
+                    'page_obj'
+                ]
+                self.assertEqual(len(first_page), PAGE_SIZE)
+                self.assertFalse(first_page.has_previous())
+                self.assertEqual(
+                    first_page[0].text,
+                    f'Тестовая запись {NUMBER_OF_POSTS}'
+                )
+
+                second_page = self.guest_client.get(
+                    address, {'cursor': first_page.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    len(second_page), NUMBER_OF_POSTS - PAGE_SIZE
+                )
+                self.assertFalse(second_page.has_next())
+                self.assertEqual(
+                    second_page[0].text,
+                    f'Тестовая запись {NUMBER_OF_POSTS - PAGE_SIZE}'
+                )
+
+                back_page = self.guest_client.get(
+                    address, {'cursor': second_page.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    list(back_page.object_list),
+                    list(first_page.object_list)
+                )
+                self.assertFalse(back_page.has_previous())
+
+    def test_equal_pub_dates(self):
+        """Записи с одинаковой датой не теряются и не дублируются."""
+        Post.objects.update(pub_date=timezone.now())
+        paginator = KeysetPaginator(Post.objects.all(), PAGE_SIZE)
+        first_page = paginator.cursor_page(None)
+        second_page = paginator.cursor_page(first_page.next_cursor)
+        seen = [post.pk for post in first_page] + [
+            post.pk for post in second_page
+        ]
+        self.assertEqual(len(seen), NUMBER_OF_POSTS)
+        self.assertEqual(len(set(seen)), NUMBER_OF_POSTS)
+
+    def test_page_number_methods(self):
+        """Методы Page возвращают курсоры соседних страниц."""
+        paginator = KeysetPaginator(Post.objects.all(), PAGE_SIZE)
+        first_page = paginator.cursor_page(None)
+        self.assertEqual(first_page.next_page_number(), first_page.next_cursor)
+        with self.assertRaises(EmptyPage):
+            first_page.previous_page_number()
+        second_page = paginator.cursor_page(first_page.next_page_number())
+        self.assertEqual(
+            second_page.previous_page_number(), second_page.previous_cursor
+        )
+        with self.assertRaises(EmptyPage):
+            second_page.next_page_number()
+
+    def test_invalid_cursor(self):
+        """Некорректный курсор возвращает первую страницу."""
+        response = self.guest_client.get(MAIN_PAGE, {'cursor': '!!bad!!'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), PAGE_SIZE)
+        self.assertFalse(page_obj.has_previous())
+
+    def test_approximate_count_is_cached(self):
+        """Приблизительный счётчик не пересчитывается на каждой странице."""
+        paginator = KeysetPaginator(
+            Post.objects.all(), PAGE_SIZE, approximate_count=True
+        )
+        self.assertEqual(paginator.count, NUMBER_OF_POSTS)
+        Post.objects.first().delete()
+        paginator = KeysetPaginator(
+            Post.objects.all(), PAGE_SIZE, approximate_count=True
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, NUMBER_OF_POSTS)
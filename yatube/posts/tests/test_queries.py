@@ -0,0 +1,107 @@
+"""Тестирование количества SQL-запросов view-функций приложения posts."""
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+SLUG = 'test_group'
+AUTHOR = 'PostAuthor'
+FOLLOWER = 'Follower'
+PAGE_SIZE = 10
+
+# Максимальное число запросов на страницу: сессия и пользователь
+# авторизованного клиента плюс запросы самой view-функции.
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 5,
+    'posts:profile': 6,
+    'posts:post_detail': 4,
+    'posts:follow_index': 5,
+}
+
+
+class QueryBudgetTest(TestCase):
+    """Число запросов не зависит от количества записей на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=AUTHOR, first_name='Имя', last_name='Фамилия'
+        )
+        cls.follower = User.objects.create_user(username=FOLLOWER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание'
+        )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовая запись',
+            group=cls.group,
+        )
+        cls.urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': SLUG}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': AUTHOR}
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': cls.post.id}
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def add_posts(self, number):
+        for i in range(number):
+            post = Post.objects.create(
+                author=self.author,
+                text=f'Запись {i}',
+                group=self.group,
+            )
+            Comment.objects.create(
+                post=self.post, author=self.follower, text=f'Комментарий {i}'
+            )
+            Comment.objects.create(
+                post=post, author=self.follower, text=f'Комментарий {i}'
+            )
+
+    def test_query_budget(self):
+        """Число запросов в пределах бюджета и не растёт с числом записей."""
+        self.add_posts(2)
+        few = {
+            name: self.count_queries(url) for name, url in self.urls.items()
+        }
+        self.add_posts(PAGE_SIZE)
+        for name, url in self.urls.items():
+            with self.subTest(view=name):
+                queries = self.count_queries(url)
+                self.assertEqual(queries, few[name])
+                self.assertLessEqual(queries, QUERY_BUDGETS[name])
+
+    def test_listing_queries_use_indexes(self):
+        """Запросы страниц со списками записей используют индексы."""
+        self.add_posts(PAGE_SIZE + 2)
+        out = StringIO()
+        call_command('explain_queries', stdout=out)
+        self.assertIn('served by an index', out.getvalue())
@@ -0,0 +1,113 @@
+"""Тестирование полнотекстового поиска приложения posts."""
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..admin import PostAdmin
+from ..models import Comment, Post, User
+from ..search import LikeSearchBackend, get_backend
+
+SEARCH_PAGE = reverse('posts:search')
+AUTHOR = 'PostAuthor'
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.cat_post = Post.objects.create(
+            author=cls.author,
+            text='Кошка спит на диване',
+        )
+        cls.dog_post = Post.objects.create(
+            author=cls.author,
+            text='Собака гуляет во дворе',
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.dog_post,
+            author=cls.author,
+            text='Кошка тоже гуляет',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query):
+        response = self.guest_client.get(SEARCH_PAGE, {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_search_posts_and_comments(self):
+        """Поиск находит записи по тексту записи и комментариев."""
+        self.assertEqual(self.search('СОБАКА'), [self.dog_post])
+        self.assertEqual(
+            set(self.search('кошка')),
+            {self.cat_post, self.dog_post}
+        )
+        self.assertEqual(self.search('кошка диване'), [self.cat_post])
+        self.assertEqual(self.search('"" OR *'), [])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении объектов."""
+        post = Post.objects.get(pk=self.cat_post.pk)
+        post.text = 'Попугай сидит на диване'
+        post.save()
+        self.assertEqual(self.search('попугай'), [self.cat_post])
+        self.assertEqual(self.search('спит'), [])
+
+        self.comment.delete()
+        self.assertEqual(self.search('кошка'), [])
+
+    def test_backends_agree(self):
+        """Индекс и LIKE-поиск находят одни и те же записи."""
+        for query in ('спит', 'гуляет', 'диване'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    set(get_backend().search(query, 10)),
+                    set(LikeSearchBackend().search(query, 10))
+                )
+                self.assertEqual(
+                    set(get_backend().filter_posts(Post.objects, query)),
+                    set(LikeSearchBackend().filter_posts(
+                        Post.objects, query
+                    ))
+                )
+
+    def test_admin_search(self):
+        """Поиск в админке использует индекс."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.guest_client.force_login(admin)
+        response = self.guest_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list),
+            [self.dog_post]
+        )
+
+    def test_admin_search_is_not_truncated(self):
+        """Поиск в админке возвращает все совпадения и верное их число."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.guest_client.force_login(admin)
+        with mock.patch.object(PostAdmin, 'list_max_show_all', 1):
+            response = self.guest_client.get(
+                reverse('admin:posts_post_changelist'), {'q': 'кошка'}
+            )
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertEqual(
+            set(response.context['cl'].result_list),
+            {self.cat_post, self.dog_post}
+        )
+
+    def test_benchmark_command(self):
+        """Команда сравнения с LIKE выводит результаты обоих поисков."""
+        out = StringIO()
+        call_command('benchmark_search', 'кошка', repeat=1, stdout=out)
+        self.assertIn('LIKE baseline', out.getvalue())
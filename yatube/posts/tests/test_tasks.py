@@ -0,0 +1,110 @@
+"""Тестирование очереди фоновых задач приложения posts."""
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import tasks
+from ..feed import feed_posts
+from ..models import Comment, Follow, Post, Task, User
+from ..search import get_backend
+
+AUTHOR = 'PostAuthor'
+FOLLOWER = 'Follower'
+
+
+class TaskQueueTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=AUTHOR, email='author@example.com'
+        )
+        cls.follower = User.objects.create_user(username=FOLLOWER)
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def run_tasks(self):
+        call_command('run_tasks', once=True, stdout=StringIO())
+
+    @override_settings(POSTS_TASKS_EAGER=False)
+    def test_side_effects_wait_for_worker(self):
+        """Запись попадает в ленту и индекс только после работы воркера."""
+        post = Post.objects.create(author=self.author, text='Новая запись')
+        self.assertTrue(Task.objects.exists())
+        self.assertFalse(feed_posts(self.follower).exists())
+        self.assertEqual(get_backend().search('новая', 10), [])
+
+        self.run_tasks()
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(list(feed_posts(self.follower)), [post])
+        self.assertEqual(get_backend().search('новая', 10), [post.id])
+
+    @override_settings(POSTS_TASKS_EAGER=False)
+    def test_payloads_are_batched(self):
+        """Одинаковые задачи пакета выполняются одним вызовом."""
+        handler = mock.Mock()
+        with mock.patch.dict(tasks._handlers, {'test': handler}):
+            for _ in range(3):
+                tasks.enqueue('test', post_id=1)
+            tasks.enqueue('test', post_id=2)
+            self.run_tasks()
+        handler.assert_called_once_with([{'post_id': 1}, {'post_id': 2}])
+
+    @override_settings(POSTS_TASKS_EAGER=False)
+    def test_failed_tasks_are_retried(self):
+        """Упавшая задача остаётся в очереди с отложенным повтором."""
+        handler = mock.Mock(side_effect=RuntimeError('boom'))
+        with mock.patch.dict(tasks._handlers, {'test': handler}):
+            tasks.enqueue('test', post_id=1)
+            with self.assertLogs('posts.tasks', 'ERROR'):
+                self.run_tasks()
+        task = Task.objects.get()
+        self.assertEqual(task.attempts, 1)
+        self.assertIn('boom', task.last_error)
+        self.assertGreater(task.run_after, task.created)
+
+    @override_settings(POSTS_TASKS_EAGER=False)
+    def test_failed_payload_does_not_hold_back_batch(self):
+        """Повтор назначается только задаче, которая упала сама."""
+        done = []
+
+        def handler(payloads):
+            if {'post_id': 2} in payloads:
+                raise RuntimeError('boom')
+            done.extend(payloads)
+
+        with mock.patch.dict(tasks._handlers, {'test': handler}):
+            for post_id in (1, 2, 3):
+                tasks.enqueue('test', post_id=post_id)
+            with self.assertLogs('posts.tasks', 'ERROR'):
+                self.run_tasks()
+        self.assertEqual(done, [{'post_id': 1}, {'post_id': 3}])
+        task = Task.objects.get()
+        self.assertEqual(task.payload, '{"post_id": 2}')
+        self.assertEqual(task.attempts, 1)
+        self.assertEqual(task.claim, '')
+
+    def test_tasks_are_leased(self):
+        """Захваченные задачи не достаются другому воркеру."""
+        with override_settings(POSTS_TASKS_EAGER=False):
+            tasks.enqueue('bump', scopes=['index'])
+        now = timezone.now()
+        self.assertEqual(len(tasks.claim_batch(10, now)), 1)
+        self.assertEqual(tasks.claim_batch(10, now), [])
+        self.assertGreater(Task.objects.get().run_after, now)
+
+    def test_comment_notification(self):
+        """Автор записи получает письмо о новом комментарии."""
+        post = Post.objects.create(author=self.author, text='Запись')
+        Comment.objects.create(
+            post=post, author=self.follower, text='Отличная запись'
+        )
+        Comment.objects.create(
+            post=post, author=self.author, text='Спасибо'
+        )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['author@example.com'])
+        self.assertIn('Отличная запись', mail.outbox[0].body)
@@ -0,0 +1,102 @@
+"""Тестирование рейтинга обсуждаемых записей."""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Follow, Post, TrendingPost, User
+
+TRENDING_PAGE = reverse('posts:trending')
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='PostAuthor')
+        cls.popular = User.objects.create_user(username='PopularAuthor')
+        cls.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=cls.reader, author=cls.popular)
+        cls.quiet = Post.objects.create(author=cls.author, text='Тихая')
+        cls.discussed = Post.objects.create(
+            author=cls.author, text='Обсуждаемая'
+        )
+        cls.followed = Post.objects.create(
+            author=cls.popular, text='Популярного автора'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, post, number=1):
+        for _ in range(number):
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий'
+            )
+
+    def update(self, now=None):
+        """Расчёт, запущенный после того, как истекло отставание."""
+        return trending.update(
+            (now or timezone.now()) + trending.commit_lag()
+        )
+
+    def ranking(self):
+        return list(trending.trending_posts())
+
+    def test_ranking(self):
+        """Записи упорядочены по комментариям и подписчикам автора."""
+        self.comment(self.discussed, 2)
+        self.comment(self.followed)
+        self.assertEqual(self.update(), 2)
+        self.assertEqual(self.ranking(), [self.discussed, self.followed])
+
+        self.comment(self.followed)
+        self.update()
+        self.assertEqual(self.ranking(), [self.followed, self.discussed])
+        self.assertNotIn(self.quiet, self.ranking())
+
+    def test_incremental_update(self):
+        """Повторный расчёт затухает старые и добавляет новые комментарии."""
+        self.comment(self.discussed)
+        now = timezone.now()
+        self.update(now)
+        later = now + trending.half_life()
+        self.comment(self.discussed)
+        Comment.objects.filter(created__gt=now).update(created=later)
+        self.update(later)
+        row = TrendingPost.objects.get(post=self.discussed)
+        # Первый комментарий за полураспад потерял половину веса.
+        self.assertAlmostEqual(row.velocity, 1.5, places=2)
+
+        self.update(later + 20 * trending.half_life())
+        self.assertFalse(TrendingPost.objects.exists())
+
+    def test_late_commit_is_counted(self):
+        """Комментарий, сохранённый позже запуска, учитывается следующим."""
+        now = timezone.now()
+        trending.update(now)
+        # Время создания комментария проставлено до запуска,
+        # а транзакция завершилась после него.
+        self.comment(self.discussed)
+        Comment.objects.update(created=now - timedelta(seconds=1))
+        self.assertEqual(self.update(now + timedelta(minutes=1)), 1)
+        self.assertEqual(self.ranking(), [self.discussed])
+
+    def test_trending_page(self):
+        """Страница показывает записи в порядке рейтинга."""
+        self.comment(self.followed)
+        self.update()
+        response = Client().get(TRENDING_PAGE)
+        self.assertEqual(
+            list(response.context['page_obj']), [self.followed]
+        )
+        self.comment(self.discussed, 3)
+        self.update()
+        response = Client().get(TRENDING_PAGE)
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.discussed, self.followed]
+        )
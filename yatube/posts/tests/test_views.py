@@ -9,7 +9,9 @@ from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from ..models import Follow, Group, Post, User
+from .. import caching, cards, thumbnails
+from ..cards import card_key, card_stats
+from ..models import Comment, Follow, Group, Post, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -159,22 +161,61 @@ class PostsURLNamesTests(TestCase):
         """Проверка кэширования объектов страницы index."""
         first_call = self.guest_client.get(MAIN_PAGE)
         first_call_content = first_call.content
-        first_call.context['page_obj'][0].delete()
+
+        # Изменения, не влияющие на главную страницу, кэш не сбрасывают.
+        User.objects.create_user(username='Unrelated')
+        second_call = self.guest_client.get(MAIN_PAGE)
+        self.assertIsNone(second_call.context)
+        self.assertEqual(first_call_content, second_call.content)
 
         form_data = {
             'text': 'Кэширование',
         }
         self.author_client.post(POST_CREATE_PAGE, data=form_data, follow=True)
 
-        second_call = self.guest_client.get(MAIN_PAGE)
-        second_call_content = second_call.content
-        self.assertEqual(first_call_content, second_call_content)
-
-        cache.clear()
-
+        # Новая запись сбрасывает кэш главной страницы.
         third_call = self.guest_client.get(MAIN_PAGE)
-        third_call_content = third_call.content
-        self.assertNotEqual(second_call_content, third_call_content)
+        self.assertNotEqual(second_call.content, third_call.content)
+        self.assertContains(third_call, form_data['text'])
+
+    def test_group_change_invalidates_pages(self):
+        """Изменение группы сбрасывает кэш страниц, где она видна."""
+        group_page = self.guest_client.get(GROUP_PAGE)
+        main_page = self.guest_client.get(MAIN_PAGE)
+        group = Group.objects.get(slug=SLUG)
+        group.title = 'Новое название группы'
+        group.save()
+        for address, old_page in ((GROUP_PAGE, group_page),
+                                  (MAIN_PAGE, main_page)):
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertNotEqual(old_page.content, response.content)
+                self.assertContains(response, group.title)
+
+    def test_shared_page_fragments(self):
+        """Общая копия страницы дополняется фрагментами пользователя."""
+        edit_link = reverse('posts:post_edit', args=(self.post.id,))
+        for address in (MAIN_PAGE, AUTHOR_PAGE, self.POST_PAGE):
+            with self.subTest(address=address):
+                self.author_client.get(address)
+                self.author_client.get(address)
+                response = self.auth_user_client.get(address)
+                self.assertContains(response, f'Пользователь: {AUTH_USER}')
+                self.assertNotContains(response, f'Пользователь: {AUTHOR}')
+                self.assertNotContains(response, edit_link)
+                self.assertNotContains(response, '<!--fragment:')
+                self.assertIn('private', response['Cache-Control'])
+                response = self.guest_client.get(address)
+                self.assertNotContains(response, 'Пользователь:')
+                self.assertNotIn('private', response['Cache-Control'])
+        self.assertContains(self.author_client.get(self.POST_PAGE), edit_link)
+        self.assertContains(
+            self.auth_user_client.get(self.POST_PAGE), 'csrfmiddlewaretoken'
+        )
+
+        self.auth_user_client.get(FOLLOW)
+        self.assertContains(self.auth_user_client.get(AUTHOR_PAGE), UNFOLLOW)
+        self.assertNotContains(self.author_client.get(AUTHOR_PAGE), UNFOLLOW)
 
     def test_subscriptions(self):
         """Проверка подписки и отписки пользователя на(от) автора."""
@@ -305,3 +346,173 @@ class PaginatorViewsTest(TestCase):
                 post_image_0,
                 f'posts/small_{self.NUMBER_OF_POSTS % paginator_limit}.gif'
             )
+
+
+class CommentsPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовая запись',
+        )
+        cls.NUMBER_OF_COMMENTS = 25
+        for i in range(1, cls.NUMBER_OF_COMMENTS + 1):
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.author,
+                text=f'Комментарий {i}',
+            )
+        cls.POST_PAGE = reverse(
+            'posts:post_detail',
+            kwargs={'post_id': cls.post.id}
+        )
+        cls.COMMENTS_PAGE = reverse(
+            'posts:post_comments',
+            kwargs={'post_id': cls.post.id}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_comments_are_paginated(self):
+        """На странице записи выводится первая страница комментариев,
+        остальные подгружаются по курсору.
+        """
+        comment_limit = 20
+        response = self.guest_client.get(self.POST_PAGE)
+        comments_page = response.context['comments_page']
+        self.assertEqual(len(comments_page), comment_limit)
+        self.assertEqual(
+            comments_page[0].text,
+            f'Комментарий {self.NUMBER_OF_COMMENTS}'
+        )
+        self.assertEqual(
+            response.context['post'].comments_count,
+            self.NUMBER_OF_COMMENTS
+        )
+
+        response = self.guest_client.get(
+            self.COMMENTS_PAGE,
+            {'cursor': comments_page.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        next_page = response.context['comments_page']
+        self.assertEqual(
+            len(next_page),
+            self.NUMBER_OF_COMMENTS - comment_limit
+        )
+        self.assertFalse(next_page.has_next())
+        self.assertEqual(
+            next_page[0].text,
+            f'Комментарий {self.NUMBER_OF_COMMENTS - comment_limit}'
+        )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовая запись',
+            image=SimpleUploadedFile(
+                name='thumb.gif',
+                content=SMALL_GIF,
+                content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_pages_use_stored_thumbnails(self):
+        """Страницы выводят заранее созданные миниатюры."""
+        response = self.guest_client.get(MAIN_PAGE)
+        self.assertContains(response, self.post.image.url)
+
+        thumbnails.generate(self.post.id)
+        post = Post.objects.get(id=self.post.id)
+        thumbnail_url = post.thumbnail_urls['card']
+        self.assertNotEqual(thumbnail_url, post.image.url)
+
+        for address in (MAIN_PAGE, AUTHOR_PAGE):
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertContains(response, thumbnail_url)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовая запись',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        cards.counters.reset()
+        self.guest_client = Client()
+
+    def test_cards_are_cached(self):
+        """Карточка записи берётся из кеша до изменения записи."""
+        self.guest_client.get(MAIN_PAGE)
+        key = card_key(Post.objects.get(id=self.post.id))
+        self.assertIn('Тестовая запись', cache.get(key))
+
+        cache.set(key, 'Карточка из кеша')
+        caching.bump(caching.INDEX)
+        response = self.guest_client.get(MAIN_PAGE)
+        self.assertContains(response, 'Карточка из кеша')
+
+    def test_changes_replace_cards(self):
+        """Изменение записи или группы меняет карточку на страницах."""
+        self.guest_client.get(MAIN_PAGE)
+        post = Post.objects.get(id=self.post.id)
+        post.text = 'Изменённая запись'
+        post.save()
+        self.group.title = 'Новое название'
+        self.group.save()
+        for address in (MAIN_PAGE, AUTHOR_PAGE):
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertContains(response, 'Изменённая запись')
+                self.assertContains(response, 'Новое название')
+
+    @override_settings(POST_CARD_STATS_FLUSH_INTERVAL=3600)
+    def test_card_counters_stay_in_process(self):
+        """Счётчики карточек попадают в кеш только при сбросе."""
+        self.guest_client.get(MAIN_PAGE)
+        self.assertIsNone(cache.get(cards.MISSES_KEY))
+        self.assertEqual(card_stats()['misses'], 1)
+        self.assertEqual(cache.get(cards.MISSES_KEY), 1)
+
+    def test_card_counters(self):
+        """Счётчики кеша карточек учитывают попадания и промахи."""
+        Post.objects.create(author=self.author, text='Вторая запись')
+        self.guest_client.get(MAIN_PAGE)
+        self.assertEqual(card_stats()['misses'], 2)
+        caching.bump(caching.INDEX)
+        self.guest_client.get(MAIN_PAGE)
+        self.assertEqual(
+            card_stats(), {'hits': 2, 'misses': 2, 'hit_ratio': 0.5}
+        )
@@ -0,0 +1,93 @@
+"""Thumbnail generation off the request path.
+
+Thumbnails for every size in POST_THUMBNAIL_SIZES are rendered by a
+background thread pool once the post is committed, and their URLs are
+stored on the post, so templates never decode or resize images and never
+query the sorl key-value store while rendering.
+"""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from . import caching, tasks
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+_executor = None
+
+
+def thumbnail_sizes():
+    return getattr(settings, 'POST_THUMBNAIL_SIZES', DEFAULT_SIZES)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'POST_THUMBNAIL_WORKERS', 2),
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def generate(post_id):
+    """Render all thumbnail sizes of a post and store their URLs."""
+    post = (
+        Post.objects.select_related('author', 'group')
+        .filter(pk=post_id).first()
+    )
+    if post is None or not post.image:
+        return
+    urls = {
+        name: get_thumbnail(post.image, geometry, **options).url
+        for name, (geometry, options) in thumbnail_sizes().items()
+    }
+    # The image may have been replaced while we were rendering.
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(urls), updated=timezone.now()
+    )
+    if updated:
+        caching.bump(*caching.post_scopes(post))
+
+
+def _generate_in_worker(post_id):
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Thumbnail generation failed for post %s', post_id)
+    finally:
+        connection.close()
+
+
+def schedule(post):
+    """Queue thumbnail generation for a post after the transaction commits.
+
+    When the task queue is not eager, rendering is left to the run_tasks
+    worker. With POST_THUMBNAIL_ASYNC = False thumbnails are rendered in
+    the calling thread instead. So are they on an in-memory SQLite database,
+    such as the test one: its table locks make concurrent writers fail
+    instead of waiting.
+    """
+    if not post.image:
+        return
+    post_id = post.pk
+    if not tasks.is_eager():
+        tasks.enqueue('generate_thumbnails', post_id=post_id)
+        return
+    in_memory = getattr(connection, 'is_in_memory_db', lambda: False)()
+    if getattr(settings, 'POST_THUMBNAIL_ASYNC', True) and not in_memory:
+        transaction.on_commit(
+            lambda: get_executor().submit(_generate_in_worker, post_id)
+        )
+    else:
+        transaction.on_commit(lambda: generate(post_id))
@@ -0,0 +1,132 @@
+"""Trending posts.
+
+A post's velocity is its number of comments, each one weighing half as
+much every TRENDING_HALF_LIFE_HOURS. That makes it incremental: a run of
+update() multiplies every stored velocity by the decay since the
+previous run and adds only the comments created since then, read through
+the index on Comment.created. A comment's created time is set before its
+transaction commits, so each run stops TRENDING_COMMIT_LAG_SECONDS
+behind the current time: a comment committed that late is still read by
+the next run instead of falling behind the watermark. The score
+multiplies the velocity by a bonus growing with the logarithm of the
+author's followers, and the best TRENDING_LIMIT posts get a rank, so the
+trending page is one read of posts joined to ranked rows in rank order.
+"""
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from . import caching
+from .models import Comment, Post, TrendingPost
+
+TRENDING = 'trending'
+# Velocities below this are dropped: one comment about 6.6 half-lives old.
+MIN_VELOCITY = 0.01
+BATCH_SIZE = 500
+
+
+def half_life():
+    return timedelta(hours=getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 6))
+
+
+def commit_lag():
+    return timedelta(
+        seconds=getattr(settings, 'TRENDING_COMMIT_LAG_SECONDS', 30)
+    )
+
+
+def decay(age):
+    return 0.5 ** (age / half_life())
+
+
+def trending_posts():
+    """Ranked posts with what their cards show, best first."""
+    return (
+        Post.objects.for_listing()
+        .filter(trending__rank__isnull=False)
+        .order_by('trending__rank')
+    )
+
+
+def new_comments(since, now):
+    """Return the decayed weight of comments created in (since, now]."""
+    velocities = defaultdict(float)
+    comments = Comment.objects.filter(
+        created__gt=since, created__lte=now
+    ).values_list('post_id', 'created')
+    for post_id, created in comments.iterator():
+        velocities[post_id] += decay(now - created)
+    return velocities
+
+
+def add_velocities(increments, now):
+    rows = TrendingPost.objects.in_bulk(list(increments))
+    TrendingPost.objects.bulk_create(
+        (TrendingPost(post_id=post_id, computed=now)
+         for post_id in increments.keys() - rows.keys()),
+        batch_size=BATCH_SIZE,
+    )
+    rows = TrendingPost.objects.in_bulk(list(increments))
+    for post_id, row in rows.items():
+        row.velocity += increments[post_id]
+    TrendingPost.objects.bulk_update(
+        rows.values(), ('velocity',), batch_size=BATCH_SIZE
+    )
+
+
+def rerank(limit):
+    """Score every row and give the best `limit` of them a rank.
+
+    Only the ranked rows are written: the new top and the rows that
+    dropped out of it.
+    """
+    follower_weight = getattr(settings, 'TRENDING_FOLLOWER_WEIGHT', 0.5)
+    scores = []
+    for post_id, velocity, followers in TrendingPost.objects.values_list(
+        'post_id', 'velocity', 'post__author__stats__followers_count'
+    ).iterator():
+        bonus = 1 + follower_weight * math.log1p(followers or 0)
+        scores.append((velocity * bonus, post_id))
+    top = [
+        TrendingPost(post_id=post_id, score=score, rank=position)
+        for position, (score, post_id)
+        in enumerate(heapq.nlargest(limit, scores), 1)
+    ]
+    TrendingPost.objects.filter(rank__isnull=False).exclude(
+        post_id__in=[row.post_id for row in top]
+    ).update(rank=None)
+    TrendingPost.objects.bulk_update(
+        top, ('score', 'rank'), batch_size=BATCH_SIZE
+    )
+    return len(top)
+
+
+def update(now=None):
+    """Fold the comments since the previous run in and rank the posts.
+
+    Velocities are computed as of commit_lag() before `now`, which is
+    stored as the watermark of the next run. Returns the number of
+    ranked posts. Without a previous run, or once every row has decayed
+    away, the comments of the last ten half-lives are read instead,
+    which gives the same velocities.
+    """
+    now = (now or timezone.now()) - commit_lag()
+    limit = getattr(settings, 'TRENDING_LIMIT', 100)
+    with transaction.atomic():
+        last_run = TrendingPost.objects.aggregate(
+            last=Max('computed')
+        )['last'] or now - 10 * half_life()
+        TrendingPost.objects.update(
+            velocity=F('velocity') * decay(now - last_run), computed=now
+        )
+        add_velocities(new_comments(last_run, now), now)
+        TrendingPost.objects.filter(velocity__lt=MIN_VELOCITY).delete()
+        ranked = rerank(limit)
+    caching.bump(TRENDING)
+    return ranked
@@ -1,53 +1,104 @@
 """Application for working with user posts."""
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
-from django.views.decorators.cache import cache_page
 from django.core.paginator import Paginator
-from django.shortcuts import (redirect,
-                              render,
-                              get_object_or_404,
-                              get_list_or_404
-                              )
-
-from .models import Follow, Group, Post, User
+from django.utils.http import urlencode
+from django.shortcuts import redirect, render, get_object_or_404
+
+from . import thumbnails
+from .cards import attach_cards
+from .models import AuthorStats, Follow, Group, Post, User
+from .caching import (INDEX,
+                      author_scope,
+                      conditional_page,
+                      group_scope,
+                      post_page_scopes,
+                      remember_post_author,
+                      versioned_cache_page
+                      )
+from .feed import feed_posts
 from .forms import CommentForm, PostForm
+from .groups import registry as group_registry
+from .paginators import KeysetPaginator
+from .search import search_posts
+from .trending import TRENDING, trending_posts
 
 CACHE_LMT = 20
 POST_LMT = 10
+COMMENT_LMT = 20
 
 
 def paginator_page(request, post_list):
+    """Return the requested page of post_list.
+
+    Uses numbered pages by default; with POSTS_PAGINATION = 'keyset'
+    pages are addressed by an opaque '?cursor=' token on (pub_date, id).
+    """
+    if getattr(settings, 'POSTS_PAGINATION', 'offset') == 'keyset':
+        paginator = KeysetPaginator(
+            post_list,
+            POST_LMT,
+            approximate_count=getattr(
+                settings, 'POSTS_APPROXIMATE_COUNT', False
+            ),
+        )
+        return paginator.cursor_page(request.GET.get('cursor'))
     paginator = Paginator(post_list, POST_LMT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
-@cache_page(CACHE_LMT, key_prefix='index_page')
+@versioned_cache_page(CACHE_LMT, 'index_page', lambda: (INDEX,))
 def index(request):
     """View-func for '' request.
 
     Displays ten posts per page, sorted by date added.
     Returns 'posts/index.html' template.
     """
-    post_list = Post.objects.all()
+    post_list = Post.objects.for_listing()
     page_obj = paginator_page(request, post_list)
+    attach_cards(page_obj)
     context = {
         'page_obj': page_obj,
     }
-    cache.clear()
     return render(request, 'posts/index.html', context)
 
 
+@versioned_cache_page(CACHE_LMT, 'trending_page', lambda: (INDEX, TRENDING))
+def trending(request):
+    """View-func for 'trending/' request.
+
+    Displays ten posts per page ranked by recent comments and
+    their authors' followers, as last computed by update_trending.
+    """
+    page_obj = Paginator(trending_posts(), POST_LMT).get_page(
+        request.GET.get('page')
+    )
+    attach_cards(page_obj)
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+@conditional_page('group_page', lambda slug: (group_scope(slug),))
+@versioned_cache_page(
+    CACHE_LMT, 'group_page', lambda slug: (group_scope(slug),)
+)
 def group_posts(request, slug):
     """View-func for 'group/<slug:slug>/' request.
 
     Displays ten posts per page, sorted by group and date added.
     Returns 'posts/group_list.html' template.
     """
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.group.all()
+    group = group_registry.get(slug)
+    if group is None:
+        # A group created moments ago may not be registered yet.
+        group = get_object_or_404(Group, slug=slug)
+    post_list = group.group.for_listing()
     page_obj = paginator_page(request, post_list)
+    attach_cards(page_obj, show_group=False)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -55,51 +106,113 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def group_index(request):
+    """View-func for 'groups/' request.
+
+    Lists every group with its number of posts and the date of the
+    latest one, straight from the group registry.
+    Returns 'posts/groups.html' template.
+    """
+    context = {
+        'groups': group_registry.all(),
+    }
+    return render(request, 'posts/groups.html', context)
+
+
+@conditional_page(
+    'profile_page', lambda username: (author_scope(username),)
+)
+@versioned_cache_page(
+    CACHE_LMT, 'profile_page', lambda username: (author_scope(username),)
+)
 def profile(request, username):
     """View-func for 'profile/<str:username>/' request.
 
     Displays ten posts per page, sorted by author and date added.
     Returns 'posts/profile.html' template.
     """
-    user = request.user
-    author = get_object_or_404(User, username=username)
-    author_posts = author.posts.all()
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    author_posts = author.posts.for_listing()
     page_obj = paginator_page(request, author_posts)
-
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(user=user, author=author).exists()
-    else:
-        following = False
-
+    attach_cards(page_obj)
     context = {
         'author': author,
-        'author_posts': author_posts,
+        'author_stats': AuthorStats.objects.for_user(author),
         'page_obj': page_obj,
-        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_page('post_page', post_page_scopes)
+@versioned_cache_page(CACHE_LMT, 'post_page', post_page_scopes)
 def post_detail(request, post_id):
     """View-func for 'posts/<int:post_id>/' request.
 
     Shows detailed information about a post.
     Returns 'posts/post_detail.html' template.
     """
-    post = get_object_or_404(Post, id=post_id)
-    author = get_object_or_404(User, username=post.author.username)
-    author_posts = get_list_or_404(Post, author=author)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        id=post_id
+    )
+    remember_post_author(post)
     form = CommentForm(request.POST or None)
-    is_author = request.user == post.author
     context = {
         'post': post,
-        'author_posts': author_posts,
+        'author_stats': AuthorStats.objects.for_user(post.author),
+        'comments_page': comments_page(post, None),
         'form': form,
-        'is_author': is_author,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def comments_page(post, cursor):
+    """Return a cursor page of a post's comments with their authors."""
+    paginator = KeysetPaginator(
+        post.comments.select_related('author'),
+        COMMENT_LMT,
+        ordering=('created', 'id'),
+    )
+    return paginator.cursor_page(cursor)
+
+
+def post_comments(request, post_id):
+    """View-func for 'posts/<int:post_id>/comments/' request.
+
+    Returns the next page of comments as an HTML fragment
+    for the 'load more' link on the post page.
+    """
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'post': post,
+        'comments_page': comments_page(post, request.GET.get('cursor')),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def search(request):
+    """View-func for 'search/' request.
+
+    Displays ten posts per page matching every word of '?q=',
+    best matches first. Returns 'posts/search.html' template.
+    """
+    query = request.GET.get('q', '').strip()
+    post_list = search_posts(query) if query else []
+    page_obj = Paginator(post_list, POST_LMT).get_page(
+        request.GET.get('page')
+    )
+    attach_cards(page_obj)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'extra_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     """View-func for 'create/' request.
@@ -112,6 +225,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.schedule(post)
         return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -135,7 +249,12 @@ def post_edit(request, post_id):
             if form.is_valid:
                 post = form.save(commit=False)
                 post.author = request.user
+                image_changed = 'image' in form.changed_data
+                if image_changed:
+                    post.thumbnails = ''
                 post.save()
+                if image_changed:
+                    thumbnails.schedule(post)
                 return redirect('posts:post_detail', post_id=post.pk)
         else:
             form = PostForm(instance=post)
@@ -165,11 +284,14 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    user = request.user
-    follow_list = Follow.objects.filter(user=user)
-    author_list = [follower.author for follower in follow_list]
-    post_list = Post.objects.filter(author__in=author_list)
+    """View-func for 'follow/' request.
+
+    Displays ten posts per page from the authors the user follows,
+    read from the materialized feed.
+    """
+    post_list = feed_posts(request.user).for_listing()
     page_obj = paginator_page(request, post_list)
+    attach_cards(page_obj)
     context = {
         'page_obj': page_obj,
     }
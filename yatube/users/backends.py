@@ -0,0 +1,40 @@
+"""Authentication backend caching the users of signed-in sessions.
+
+AuthenticationMiddleware loads the user of the session on every request
+that touches request.user. CachedModelBackend keeps that user in the
+shared cache for USER_CACHE_TIMEOUT seconds, so a signed-in page view
+reads the session and the user from the cache instead of two tables.
+Saving or deleting a user drops the cached copy, and the session auth
+hash is still checked against the cached password hash, so changing the
+password logs out the other sessions right away.
+
+QuerySet.update() sends no signals: a user deactivated or changed that
+way keeps the cached copy, and stays signed in, until it expires after
+USER_CACHE_TIMEOUT seconds. Save the instances, or call forget_user()
+for the updated ids, when that matters.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_key(user_id):
+    return f'users:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(
+                    key, user, getattr(settings, 'USER_CACHE_TIMEOUT', 60)
+                )
+        return user
+
+
+def forget_user(user_id):
+    """Drop the cached copy of a user, read again on the next request."""
+    cache.delete(user_key(user_id))
@@ -1,19 +1,47 @@
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
+
+def env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_list(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-SECRET_KEY = '$o(m+$6g#(+$!k-!n&)k==di)q-bgbyygqxj^v*v^!_ocxclq-'
+# Профиль настроек: development (по умолчанию) или production
+ENVIRONMENT = os.getenv('DJANGO_ENV', 'development')
+PRODUCTION = ENVIRONMENT == 'production'
 
-DEBUG = True
+SECRET_KEY = os.getenv('SECRET_KEY')
+if not SECRET_KEY:
+    if PRODUCTION:
+        raise ImproperlyConfigured('SECRET_KEY must be set in production.')
+    SECRET_KEY = '$o(m+$6g#(+$!k-!n&)k==di)q-bgbyygqxj^v*v^!_ocxclq-'
 
-ALLOWED_HOSTS = [
+DEBUG = env_bool('DEBUG', not PRODUCTION)
+
+ALLOWED_HOSTS = env_list('ALLOWED_HOSTS', [
     'localhost',
     '127.0.0.1',
     '[::1]',
     'testserver',
     'www.igredk.pythonanywhere.com',
     'igredk.pythonanywhere.com',
-]
+])
+
+# debug_toolbar подключается только в разработке
+DEBUG_TOOLBAR = env_bool('DEBUG_TOOLBAR', DEBUG and not PRODUCTION)
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -27,20 +55,29 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'about.apps.AboutConfig',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index(
+            'django.contrib.auth.middleware.AuthenticationMiddleware'
+        ) + 1,
+        'debug_toolbar.middleware.DebugToolbarMiddleware'
+    )
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -53,7 +90,7 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
+        'APP_DIRS': not PRODUCTION,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -66,21 +103,67 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCTION:
+    # Шаблоны компилируются один раз на процесс
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': os.getenv('DB_USER', ''),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        # Соединение переиспользуется между запросами одного воркера
+        'CONN_MAX_AGE': int(
+            os.getenv('DB_CONN_MAX_AGE', 60 if PRODUCTION else 0)
+        ),
     }
 }
 
+# В production кэш общий для всех воркеров: файловый по умолчанию,
+# memcached или любой другой бэкенд задаётся через окружение.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+            if PRODUCTION
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'cache') if PRODUCTION else ''
+        ),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
     }
 }
 
+# Сессии читаются из кэша и пишутся в базу; signed_cookies хранит их
+# в подписанной cookie и не обращается ни к кэшу, ни к базе.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'
+)
+
+# Пользователь сессии берётся из кэша, а не из базы, на каждом запросе.
+# ModelBackend остаётся вторым, чтобы сессии, открытые до появления
+# кэширующего бэкенда, работали до следующего входа.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# Изменения пользователей через QuerySet.update() обходят сигналы
+# и видны вошедшим пользователям не позже чем через это время.
+USER_CACHE_TIMEOUT = 60
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation'
@@ -123,3 +206,75 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+POSTS_PAGINATION = 'offset'
+POSTS_APPROXIMATE_COUNT = False
+
+FEED_FANOUT_LIMIT = 1000
+FEED_BACKFILL_LIMIT = 500
+FEED_HEAVY_AUTHORS_TIMEOUT = 60
+
+POST_THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+POST_THUMBNAIL_ASYNC = True
+POST_THUMBNAIL_WORKERS = 2
+
+POSTS_SEARCH_BACKEND = None
+POSTS_SEARCH_LIMIT = 100
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+POST_CARD_STATS_FLUSH_INTERVAL = 10
+
+# Побочные действия записи выполняются сразу, если не запущен воркер run_tasks
+POSTS_TASKS_EAGER = env_bool('POSTS_TASKS_EAGER', not PRODUCTION)
+POSTS_TASKS_BATCH_SIZE = 100
+POSTS_TASKS_MAX_ATTEMPTS = 5
+POSTS_TASKS_RETRY_DELAY = 60
+# Секунды, на которые воркер захватывает задачи пакета
+POSTS_TASKS_LEASE = 300
+
+TRENDING_HALF_LIFE_HOURS = 6
+TRENDING_FOLLOWER_WEIGHT = 0.5
+TRENDING_LIMIT = 100
+# Секунды, на которые расчёт отстаёт от текущего времени, чтобы
+# комментарии из ещё не завершённых транзакций попали в следующий запуск
+TRENDING_COMMIT_LAG_SECONDS = 30
+
+# Доля запросов, для которых собираются метрики, и токен для /metrics
+METRICS_SAMPLE_RATE = float(
+    os.getenv('METRICS_SAMPLE_RATE', '0.1' if PRODUCTION else '1')
+)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Запросы к базе дольше порога (в мс) пишутся в журнал медленных запросов
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_LOG_FILE = os.getenv(
+    'SLOW_QUERY_LOG_FILE', os.path.join(BASE_DIR, 'logs', 'slow_queries.log')
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'slow_queries': {
+            'format': '%(asctime)s %(message)s',
+        },
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'core.slow_queries.AsyncRotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'slow_queries',
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}